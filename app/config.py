@@ -1,29 +1,122 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./savannah_orders.db"
     TEST_DATABASE_URL: Optional[str] = "sqlite:///./test_savannah_orders.db"
+    DB_ECHO: bool = False  # Log every SQL statement (independent of DEBUG)
+
+    # Read replicas (GET handlers); empty means reads go to DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []  # JSON list in the environment
+    DB_REPLICA_STRATEGY: str = "round_robin"  # or "least_connections"
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # Reads go to the primary this long after a write
+
+    # Connection pool (Postgres)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_PRE_PING: bool = True  # Detect connections dropped by the server or a proxy
+    DB_POOL_RECYCLE: int = 1800  # Replace connections older than this (seconds); -1 disables
+
+    # SQLite pragmas, applied to every new connection; None leaves the SQLite default
+    SQLITE_JOURNAL_MODE: Optional[str] = "WAL"  # Readers no longer block the writer
+    SQLITE_SYNCHRONOUS: Optional[str] = "NORMAL"  # Durable at checkpoints; safe with WAL
+    SQLITE_MMAP_SIZE: Optional[int] = 268435456  # 256 MiB of memory-mapped reads
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = 5000  # Wait for the write lock instead of failing
+    SQLITE_FOREIGN_KEYS: bool = True
+    # One writer at a time: a small pool queues fairly instead of spinning on busy_timeout
+    SQLITE_POOL_SIZE: int = 5
+    SQLITE_MAX_OVERFLOW: int = 0
 
     # Security
     SECRET_KEY: str = "your-secret-key-for-development-only-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_MAX_SIZE: int = 10000  # Verified tokens kept until exp; 0 disables
 
     # OpenID Connect
     OIDC_ISSUER: str = "https://dev-example.auth0.com/"
     OIDC_CLIENT_ID: str = "example-client-id"
     OIDC_CLIENT_SECRET: str = "example-client-secret"
+    OIDC_JWKS_URI: Optional[str] = None  # Defaults to {OIDC_ISSUER}.well-known/jwks.json
+    OIDC_ALGORITHMS: List[str] = ["RS256", "ES256"]  # Verified against the issuer's JWKS
+    JWKS_CACHE_TTL_SECONDS: float = 3600
+    JWKS_REFRESH_AHEAD_SECONDS: float = 300  # Refresh in the background this long before expiry
+    JWKS_MIN_REFETCH_SECONDS: float = 30  # Unknown kid refetches are limited to one per window
+    JWKS_HTTP_TIMEOUT: float = 5.0
 
     # Africa's Talking
     AT_USERNAME: str = "sandbox"  # Sandbox environment username
     AT_API_KEY: str = ("atsk_12fe129afbdfdce0af7a4ec07587139b2a89299e2ff71bcba1a77f32a6f3f816f217dd01")  # noqa: E501
     AT_SENDER_ID: str = "SAVANNAH"  # Use SAVANNAH as sender ID
+    AT_SMS_URL: str = "https://api.sandbox.africastalking.com/version1/messaging"
+
+    # SMS HTTP client (one pooled keep-alive client per worker)
+    SMS_CONNECT_TIMEOUT: float = 5.0
+    SMS_READ_TIMEOUT: float = 10.0
+    SMS_MAX_CONNECTIONS: int = 20
+    SMS_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SMS_KEEPALIVE_EXPIRY: float = 30.0
+    SMS_MAX_CONCURRENCY: int = 10  # In-flight requests to Africa's Talking
+
+    # Notification outbox worker (python -m app.workers.outbox)
+    OUTBOX_WORKER_IN_PROCESS: bool = False  # Single-container deployments opt in
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 600.0
+    OUTBOX_LEASE_SECONDS: float = 60.0  # Claimed rows are retried if a worker dies mid-send
+
+    # Bulk import
+    IMPORT_BATCH_SIZE: int = 500  # Rows per uniqueness check, INSERT and commit
+    IMPORT_MAX_ERRORS: int = 1000  # Per-row errors echoed back in the report
+    ORDER_BATCH_MAX_SIZE: int = 1000  # Orders accepted by POST /orders/batch
+
+    # Idempotency-Key on POST /customers and POST /orders
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0  # Retries within this window replay the response
+    IDEMPOTENCY_COMPACTION_INTERVAL_SECONDS: float = 3600.0  # In-process cleanup; 0 disables
+
+    # Streaming export
+    EXPORT_CHUNK_SIZE: int = 1000  # Rows fetched from the server-side cursor per write
+
+    # Response compression (negotiated br/gzip)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes; smaller bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # Brotli's 11 is far too slow for dynamic responses
+
+    # Metrics (Prometheus text format on GET /metrics)
+    METRICS_ENABLED: bool = True  # Request, query, auth and SMS timings; cheap enough for prod
+    QUERY_INSPECTION_ENABLED: bool = False  # Dev: X-DB-Query-Count header and N+1 warnings
+    QUERY_REPEAT_THRESHOLD: int = 3  # Same statement shape this often in one request is logged
+
+    # Customer lookup cache (order hot path)
+    CUSTOMER_CACHE_MAX_SIZE: int = 10000  # In-process LRU entries; 0 disables the local tier
+    CUSTOMER_CACHE_TTL_SECONDS: float = 60.0  # Bounds staleness across workers
+    CUSTOMER_CACHE_SHARED_URL: Optional[str] = None  # e.g. redis://localhost:6379/0
+
+    # Per-client rate limiting (token buckets keyed on the JWT subject)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_READ_PER_SECOND: float = 50.0  # GET/HEAD/OPTIONS refill rate
+    RATE_LIMIT_READ_BURST: int = 200
+    RATE_LIMIT_WRITE_PER_SECOND: float = 10.0  # Everything else
+    RATE_LIMIT_WRITE_BURST: int = 50
+    RATE_LIMIT_MAX_CLIENTS: int = 100000  # In-process buckets kept (LRU)
+    RATE_LIMIT_SHARED_URL: Optional[str] = None  # e.g. redis://localhost:6379/1; shared by workers
+
+    # Admission control (shed with 503 instead of queueing when overloaded)
+    ADMISSION_MAX_IN_FLIGHT: int = 1000  # Concurrent requests per worker; 0 disables
+    ADMISSION_MAX_POOL_WAITERS: int = 50  # Requests beyond pool capacity once it is exhausted
+
+    # Analytics
+    ANALYTICS_ROLLUP_ENABLED: bool = False  # Maintain and read order_daily_rollups
 
     # Application
     DEBUG: bool = True
+    AUTO_CREATE_TABLES: bool = True  # Set false once the schema is managed by `alembic upgrade`
 
     class Config:
         env_file = ".env"
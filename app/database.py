@@ -1,24 +1,259 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
-import os
+from app.services.cache import TTLCache
+from app.services.metrics import record_query
+from app.services.query_inspector import inspect_statement
+from contextlib import asynccontextmanager
+import hashlib
+import itertools
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
-# Use SQLite for development to avoid PostgreSQL installation issues
-database_url = os.getenv("DATABASE_URL", "sqlite:///./savannah_orders.db")
+# SQLite by default for development; set DATABASE_URL for Postgres in production
+database_url = settings.DATABASE_URL
 
-engine = create_engine(
-    database_url,
-    echo=settings.DEBUG,
-    connect_args={"check_same_thread": False} if "sqlite" in database_url else {}
-)
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url[len("postgresql+psycopg2:"):]
+    if url.startswith("postgresql:"):
+        return "postgresql+asyncpg:" + url[len("postgresql:"):]
+    if url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url[len("postgres:"):]
+    return url
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Engine keyword arguments (pool, echo, connect_args) from the DB_* / SQLITE_* settings"""
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+            return options  # In-memory databases use a single-connection pool
+        options.update(
+            pool_size=settings.SQLITE_POOL_SIZE,
+            max_overflow=settings.SQLITE_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+        return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def sqlite_pragmas() -> List[str]:
+    pragmas = []
+    if settings.SQLITE_JOURNAL_MODE:
+        pragmas.append(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    if settings.SQLITE_SYNCHRONOUS:
+        pragmas.append(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    if settings.SQLITE_MMAP_SIZE is not None:
+        pragmas.append(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    if settings.SQLITE_BUSY_TIMEOUT_MS is not None:
+        pragmas.append(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    if settings.SQLITE_FOREIGN_KEYS:
+        pragmas.append("PRAGMA foreign_keys=ON")
+    return pragmas
+
+
+def apply_sqlite_pragmas(sync_engine):
+    """Run the SQLITE_* pragmas on each new connection (pass ``.sync_engine`` for async)"""
+    if sync_engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def instrument_engine(sync_engine):
+    """
+    Hook statement inspection (query budgets, N+1 warnings) and, with
+    METRICS_ENABLED, statement timing into an engine (pass ``.sync_engine``
+    for async)
+    """
+    timed = settings.METRICS_ENABLED
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        inspect_statement(statement)
+        if timed and context is not None:
+            context._query_started = time.perf_counter()
+
+    if timed:
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def record_query_time(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, "_query_started", None)
+            if started is not None:
+                record_query(statement, time.perf_counter() - started)
+
+
+# Sync engine is kept for schema management (create_all) and scripts
+engine = create_engine(database_url, **engine_options(database_url))
+apply_sqlite_pragmas(engine)
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine serves the API so handlers yield while waiting on the database
+async_engine = create_async_engine(to_async_url(database_url), **engine_options(database_url))
+apply_sqlite_pragmas(async_engine.sync_engine)
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+def _pool_capacity(url: str) -> Optional[int]:
+    options = engine_options(url)
+    if "pool_size" not in options or options["max_overflow"] < 0:
+        return None  # Single-connection or unbounded pool
+    return options["pool_size"] + options["max_overflow"]
+
+
+_async_pool_capacity = _pool_capacity(database_url)
+
+
+def pool_usage() -> Optional[Tuple[int, int]]:
+    """(checked-out connections, capacity) of the primary async pool; None if unbounded"""
+    if _async_pool_capacity is None:
+        return None
+    return async_engine.pool.checkedout(), _async_pool_capacity
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller for read-your-writes: its credentials, else its address"""
+    credentials = request.headers.get("authorization")
+    if credentials:
+        return hashlib.sha256(credentials.encode()).hexdigest()
+    return request.client.host if request.client else ""
+
+
+class ReadRouter:
+    """
+    Routes read sessions across replicas, falling back to the primary.
+
+    ``round_robin`` rotates through the replicas; ``least_connections`` picks
+    the replica with the fewest sessions currently open through this router.
+    A client that wrote within ``sticky_seconds`` reads from the primary so it
+    sees its own writes despite replication lag.
+    """
+
+    def __init__(self, primary: async_sessionmaker,
+                 replicas: Sequence[async_sessionmaker] = (),
+                 strategy: Optional[str] = None, sticky_seconds: Optional[float] = None,
+                 max_clients: int = 100000):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy or settings.DB_REPLICA_STRATEGY
+        if self.strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy: {self.strategy}")
+        sticky = settings.DB_READ_YOUR_WRITES_SECONDS if sticky_seconds is None else sticky_seconds
+        self.recent_writers = TTLCache(maxsize=max_clients if sticky > 0 else 0, ttl=sticky)
+        self.in_use = [0] * len(self.replicas)
+        self._rotation = itertools.count()
+
+    def record_write(self, key: str):
+        self.recent_writers.set(key, True)
+
+    def choose(self, key: Optional[str] = None) -> Optional[int]:
+        """Index of the replica to read from, or None for the primary"""
+        if not self.replicas or (key is not None and self.recent_writers.get(key)):
+            return None
+        count = len(self.replicas)
+        start = next(self._rotation) % count
+        if self.strategy == "round_robin":
+            return start
+        # Fewest in-flight sessions; ties rotate so idle replicas share the load
+        return min(range(count), key=lambda i: (self.in_use[i], (i - start) % count))
+
+    @asynccontextmanager
+    async def write_session(self, key: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+        """Primary session; passing the writer's ``key`` makes its reads sticky"""
+        if key is not None:
+            self.record_write(key)
+        async with self.primary() as db:
+            yield db
+        if key is not None:
+            # Restart the window once the write has finished
+            self.record_write(key)
+
+    def read_factory(self, key: Optional[str] = None) -> async_sessionmaker:
+        """
+        Sessionmaker for a read that outlives the request scope (streaming).
+        Same replica choice and read-your-writes check as ``read_session``; the
+        streamed session is not counted in ``in_use``.
+        """
+        index = self.choose(key)
+        return self.primary if index is None else self.replicas[index]
+
+    @asynccontextmanager
+    async def read_session(self, key: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+        index = self.choose(key)
+        if index is None:
+            async with self.primary() as db:
+                yield db
+            return
+        self.in_use[index] += 1
+        try:
+            async with self.replicas[index]() as db:
+                yield db
+        finally:
+            self.in_use[index] -= 1
+
+
+def _replica_sessions(url: str) -> async_sessionmaker:
+    replica_engine = create_async_engine(to_async_url(url), **engine_options(url))
+    apply_sqlite_pragmas(replica_engine.sync_engine)
+    instrument_engine(replica_engine.sync_engine)
+    return async_sessionmaker(
+        replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+read_router = ReadRouter(
+    AsyncSessionLocal, [_replica_sessions(url) for url in settings.DATABASE_REPLICA_URLS]
+)
+
+
+async def get_db(request: Request):
+    writer = client_key(request) if request.method not in SAFE_METHODS else None
+    async with read_router.write_session(writer) as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Session for GET handlers: a replica when configured, else the primary"""
+    async with read_router.read_session(client_key(request)) as db:
         yield db
-    finally:
-        db.close()
+
+
+def get_session_factory():
+    """Session factory for handlers whose work outlives the request scope (streaming)"""
+    return AsyncSessionLocal
+
+
+def get_read_session_factory(request: Request) -> async_sessionmaker:
+    """Like get_session_factory, for GET handlers: routed as get_read_db routes sessions"""
+    return read_router.read_factory(client_key(request))
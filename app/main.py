@@ -1,19 +1,61 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import customers, orders
-from app.database import engine
-from app.models import customer, order
+from fastapi.responses import PlainTextResponse
+from app.routers import customers, orders, reports
+from app.database import AsyncSessionLocal, engine, read_router
+from app.models import customer, order, notification, rollup, idempotency
 from app.config import settings
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_inspector import QueryInspectorMiddleware
+from app.services import metrics as app_metrics
 from app.services.auth import auth_service
+from app.services.customer_cache import customer_cache
+from app.services.idempotency import idempotency_keys
+from app.services.rate_limit import enforce_rate_limit
+from app.services.sms import sms_service
+from app.workers.outbox import OutboxWorker
+
+# Create database tables (development convenience; migrations live in migrations/)
+if settings.AUTO_CREATE_TABLES:
+    customer.Base.metadata.create_all(bind=engine)
+    order.Base.metadata.create_all(bind=engine)
+    notification.Base.metadata.create_all(bind=engine)
+    rollup.Base.metadata.create_all(bind=engine)
+    idempotency.Base.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    outbox_task = None
+    if settings.OUTBOX_WORKER_IN_PROCESS:
+        # Opt-in for single-container deployments; normally `python -m
+        # app.workers.outbox` runs as its own process, away from request serving
+        outbox_worker = OutboxWorker()
+        outbox_task = asyncio.create_task(outbox_worker.run_forever())
+    compaction_task = None
+    if settings.IDEMPOTENCY_COMPACTION_INTERVAL_SECONDS > 0:
+        compaction_task = asyncio.create_task(idempotency_keys.run_compaction(AsyncSessionLocal))
+    yield
+    if outbox_task is not None:
+        outbox_worker.stop()
+        await outbox_task
+    if compaction_task is not None:
+        idempotency_keys.stop()
+        await compaction_task
+    # Release pooled outbound connections
+    await sms_service.aclose()
+    await auth_service.jwks.aclose()
 
-# Create database tables
-customer.Base.metadata.create_all(bind=engine)
-order.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Savannah Orders API",
     description="Customer and Order Management System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -25,9 +67,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+if settings.QUERY_INSPECTION_ENABLED:
+    app.add_middleware(QueryInspectorMiddleware)
+
+# Sheds before any other work is done; only metrics sits outside it
+app.add_middleware(AdmissionControlMiddleware)
+
+# Added last so it is the outermost middleware and times everything above
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
-app.include_router(customers.router, prefix="/api/v1")
-app.include_router(orders.router, prefix="/api/v1")
+# Per-client token buckets; reuses each request's verify_token result
+rate_limited = [Depends(enforce_rate_limit)]
+app.include_router(customers.router, prefix="/api/v1", dependencies=rate_limited)
+app.include_router(orders.router, prefix="/api/v1", dependencies=rate_limited)
+app.include_router(reports.router, prefix="/api/v1", dependencies=rate_limited)
 
 @app.get("/")
 async def root():
@@ -37,6 +95,35 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+
+def _customer_cache_stats():
+    stats = customer_cache.stats()
+    return {"hits": stats["local_hits"], "misses": stats["local_misses"],
+            "size": stats["local_size"], "db_loads": stats["db_loads"],
+            "hit_rate": stats["hit_rate"]}
+
+
+def _customer_shared_cache_stats():
+    # Only local misses reach the shared tier (Redis, when configured)
+    stats = customer_cache.stats()
+    return {"hits": stats["shared_hits"], "misses": stats["shared_misses"]}
+
+
+app_metrics.registry.register(app_metrics.CacheCollector({
+    "auth_tokens": auth_service.token_cache.stats,
+    "customers": _customer_cache_stats,
+    "customers_shared": _customer_shared_cache_stats,
+    "read_your_writes": read_router.recent_writers.stats,
+}))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint; keep it off the public ingress"""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled", status_code=404)
+    return PlainTextResponse(app_metrics.render(), media_type=app_metrics.CONTENT_TYPE)
+
 # OpenID Connect Discovery Endpoints
 @app.get("/.well-known/openid_configuration")
 async def openid_configuration():
@@ -0,0 +1,70 @@
+from typing import Callable, Optional, Tuple
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.database import pool_usage
+from app.services.metrics import ADMISSION_SHED
+
+# Probes and scrapes must keep answering while the API is shedding
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
+RETRY_AFTER_SECONDS = 1
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load with an immediate 503 instead of letting requests queue until
+    DB_POOL_TIMEOUT. A request is rejected when ``max_in_flight`` requests are
+    already being served, or when every pooled connection is checked out and
+    more than ``max_pool_waiters`` requests beyond the pool's capacity are in
+    flight (an estimate of the pool's wait queue). Per-client limits are the
+    rate limiter's job (429); this only protects the worker as a whole.
+    """
+
+    def __init__(self, app: ASGIApp, max_in_flight: Optional[int] = None,
+                 max_pool_waiters: Optional[int] = None,
+                 pool_status: Callable[[], Optional[Tuple[int, int]]] = pool_usage):
+        self.app = app
+        self.max_in_flight = (settings.ADMISSION_MAX_IN_FLIGHT
+                              if max_in_flight is None else max_in_flight)
+        self.max_pool_waiters = (settings.ADMISSION_MAX_POOL_WAITERS
+                                 if max_pool_waiters is None else max_pool_waiters)
+        self.pool_status = pool_status
+        self.in_flight = 0
+
+    def shed_reason(self) -> Optional[str]:
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        usage = self.pool_status()
+        if usage is not None:
+            checked_out, capacity = usage
+            if checked_out >= capacity and self.in_flight - capacity >= self.max_pool_waiters:
+                return "db_pool"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.shed_reason()
+        if reason is not None:
+            ADMISSION_SHED.labels(reason).inc()
+            body = orjson.dumps({"detail": "Server is overloaded, retry shortly"})
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(RETRY_AFTER_SECONDS).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,62 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import (
+    HTTP_IN_FLIGHT, HTTP_REQUEST_DB_SECONDS, HTTP_REQUEST_QUERIES, HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS, track_queries
+)
+
+# Label for requests no route matched, so 404 scans cannot grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template (``/api/v1/orders/{order_id}``), not the raw path"""
+    # Newer FastAPI matches included routers in place: scope["route"] is the
+    # router-relative route, and the prefixed path lives on the effective context
+    fastapi_scope = scope.get("fastapi")
+    if isinstance(fastapi_scope, dict):
+        path = getattr(fastapi_scope.get("effective_route_context"), "path", None)
+        if path:
+            return path
+    return getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Per-request latency, status code, in-flight count and database statement
+    count/time, labelled by route template. Add it last so it is the
+    outermost user middleware and times compression too. Streamed bodies are
+    timed to the last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # Unless a response starts, the error handler answers 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            with track_queries() as queries:
+                await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            HTTP_REQUEST_QUERIES.labels(route).observe(queries.count)
+            HTTP_REQUEST_DB_SECONDS.labels(route).observe(queries.seconds)
@@ -0,0 +1,42 @@
+import logging
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.query_inspector import inspect_request
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInspectorMiddleware:
+    """
+    Development aid (``QUERY_INSPECTION_ENABLED``): counts the statements each
+    request runs, returns the count as ``X-DB-Query-Count`` and logs a warning
+    when one statement shape repeats ``repeat_threshold`` times, the usual
+    sign of an N+1 load. The header carries the count when the response
+    starts, so statements run while streaming are only logged.
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: Optional[int] = None):
+        self.app = app
+        self.repeat_threshold = (settings.QUERY_REPEAT_THRESHOLD
+                                 if repeat_threshold is None else repeat_threshold)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with inspect_request() as log:
+            async def send_with_count(message: Message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["X-DB-Query-Count"] = str(log.count)
+                await send(message)
+
+            await self.app(scope, receive, send_with_count)
+
+        repeated = log.repeated(self.repeat_threshold)
+        if repeated:
+            logger.warning("Possible N+1 in %s %s:\n%s",
+                           scope["method"], scope["path"], log.report())
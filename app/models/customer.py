@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, DDL, String, DateTime, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime
 import uuid
 from app.database import Base
 
@@ -13,8 +14,69 @@ class Customer(Base):
     code = Column(String(50), unique=True, nullable=False, index=True)
     phone_number = Column(String(20), nullable=False)
     email = Column(String(255), nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    # Python-side default keeps sub-second precision for (created_at, id) keyset paging
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+    # Python-side too: ETags derive from it and func.now() has 1s resolution on SQLite
+    updated_at = Column(DateTime, onupdate=datetime.utcnow)
 
     # Relationship
     orders = relationship("Order", back_populates="customer")
+
+    __table_args__ = (
+        Index("ix_customers_created_at_id", "created_at", "id"),
+    )
+
+
+# Search index, outside the ORM metadata because it is dialect-specific:
+# - SQLite: an FTS5 table keyed by customers.rowid, kept in sync by triggers,
+#   with prefix indexes so "jan*" style lookups stay index-only. The phone
+#   column holds the E.164 digits and the national number (after +254).
+# - Postgres: trigram GIN indexes serving substring ILIKE lookups.
+SEARCH_TABLE = "customers_fts"
+
+_FTS_VALUES = ("{row}.rowid, {row}.name, {row}.code, "
+               "{row}.phone_number || ' ' || substr({row}.phone_number, 5), "
+               "coalesce({row}.email, '')")
+
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "name, code, phone, email, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    f"CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN "
+    f"INSERT INTO {SEARCH_TABLE} (rowid, name, code, phone, email) "
+    f"VALUES ({_FTS_VALUES.format(row='new')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN "
+    f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.rowid; END",
+    f"CREATE TRIGGER IF NOT EXISTS customers_fts_au AFTER UPDATE ON customers BEGIN "
+    f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.rowid; "
+    f"INSERT INTO {SEARCH_TABLE} (rowid, name, code, phone, email) "
+    f"VALUES ({_FTS_VALUES.format(row='new')}); END",
+]
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_customers_name_trgm "
+    "ON customers USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_email_trgm "
+    "ON customers USING gin (lower(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_code_trgm "
+    "ON customers USING gin (lower(code) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_phone_number_trgm "
+    "ON customers USING gin (phone_number gin_trgm_ops)",
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Customer.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Customer.__table__, "after_create",
+                 DDL(statement).execute_if(dialect="postgresql"))
+event.listen(Customer.__table__, "before_drop",
+             DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect="sqlite"))
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Alembic autogenerate filter: the search index is managed by hand"""
+    if type_ == "table":
+        return not (name or "").startswith(SEARCH_TABLE)
+    if type_ == "index":
+        return not (name or "").endswith("_trgm")
+    return True
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdempotencyRecord(Base):
+    """
+    Stored response of a POST sent with an ``Idempotency-Key``. The row is
+    inserted at the start of the request's transaction and filled in before
+    it commits, so other transactions only ever see finished responses.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(String(64), primary_key=True)  # SHA-256 of caller, endpoint and key
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request body
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, DateTime, Integer, Index
+from sqlalchemy.sql import func
+from datetime import datetime
+import uuid
+from app.database import Base
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    idempotency_key = Column(String(100), unique=True, nullable=False)
+    phone_number = Column(String(20), nullable=False)
+    message = Column(String(1000), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending/sending/sent/failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(String(500), nullable=True)
+    provider_message_id = Column(String(100), nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
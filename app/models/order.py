@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, String, DateTime, Index, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime
 import uuid
 from app.database import Base
 
@@ -14,8 +15,17 @@ class Order(Base):
     amount = Column(Float, nullable=False)
     time = Column(DateTime, nullable=False)
     description = Column(String(500), nullable=False)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    # Python-side default keeps sub-second precision for (created_at, id) keyset paging
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
+    # Python-side too: ETags derive from it and func.now() has 1s resolution on SQLite
+    updated_at = Column(DateTime, onupdate=datetime.utcnow)
 
     # Relationship
     customer = relationship("Customer", back_populates="orders")
+
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_orders_customer_id_time", "customer_id", "time"),
+        Index("ix_orders_time", "time"),
+    )
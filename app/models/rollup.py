@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Date, Integer, Float, Index
+from app.database import Base
+
+
+class OrderDailyRollup(Base):
+    """Per-customer, per-day order totals maintained incrementally by the orders router"""
+    __tablename__ = "order_daily_rollups"
+
+    customer_id = Column(String(36), primary_key=True)
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_order_daily_rollups_day", "day"),
+    )
@@ -1,94 +1,256 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.customer import Customer
-from app.schemas.customer import Customer as CustomerSchema, CustomerCreate, CustomerUpdate
+from app.models.order import Order
+from app.schemas.customer import (
+    Customer as CustomerSchema, CustomerCreate, CustomerImportResult, CustomerPage,
+    CustomerUpdate
+)
 from app.services.auth import auth_service
+from app.services.customer_cache import customer_cache
+from app.services.etag import (
+    etag_matches, make_etag, not_modified, require_match, version_columns
+)
+from app.services.idempotency import idempotency_keys
+from app.services.importer import CustomerImporter, iter_csv, iter_ndjson
+from app.services.pagination import keyset_page, next_cursor
+from app.services.search import customer_search_query, has_search_terms
+from app.services.serialization import (
+    ORJSONResponse, parse_fields, projected_columns, rows_to_dicts
+)
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
 @router.post("/", response_model=CustomerSchema, status_code=status.HTTP_201_CREATED)
 async def create_customer(
     customer: CustomerCreate,
-    db: Session = Depends(get_db),
-    current_user = Depends(auth_service.verify_token)
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(auth_service.verify_token),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    # Check if customer code already exists
-    existing_customer = db.query(Customer).filter(Customer.code == customer.code).first()
-    if existing_customer:
+    # A retry with the same Idempotency-Key gets the first response back
+    claim = None
+    if idempotency_key is not None:
+        claim = await idempotency_keys.claim(db, idempotency_key, current_user["sub"],
+                                             "POST /customers", customer.model_dump(mode="json"))
+        if claim.replay is not None:
+            return claim.replay
+    
+    # The unique index on code is the duplicate check; no SELECT beforehand
+    try:
+        db_customer = await db.scalar(
+            insert(Customer).values(**customer.model_dump()).returning(Customer)
+        )
+        if claim is not None:
+            await idempotency_keys.complete(
+                db, claim, status.HTTP_201_CREATED,
+                CustomerSchema.model_validate(db_customer).model_dump(mode="json")
+            )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Customer with this code already exists"
         )
     
-    db_customer = Customer(**customer.model_dump())
-    db.add(db_customer)
-    db.commit()
-    db.refresh(db_customer)
-    
     return db_customer
 
-@router.get("/", response_model=List[CustomerSchema])
+@router.post("/import", response_model=CustomerImportResult)
+async def import_customers(
+    request: Request,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(auth_service.verify_token)
+):
+    """
+    Bulk-create customers from an NDJSON (one object per line) or CSV (header
+    row with name, code, phone_number, email) body. The body is parsed as it
+    streams in and written in batches; rows that fail validation or reuse an
+    existing code are reported back with their line number.
+    """
+    content_type = request.headers.get("content-type", "")
+    format = format or ("csv" if "csv" in content_type else "ndjson")
+    if format == "csv":
+        records = iter_csv(request.stream())
+    elif format == "ndjson":
+        records = iter_ndjson(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Supported import formats are ndjson and csv"
+        )
+    
+    return await CustomerImporter(db).run(records)
+
+@router.get("/", response_model=Union[List[CustomerSchema], CustomerPage])
 async def get_customers(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(auth_service.verify_token)
+):
+    """
+    Offset paging (``skip``) returns a plain list. Passing ``cursor`` (empty for
+    the first page) switches to keyset paging on (created_at, id) and returns
+    ``{"items": [...], "next_cursor": ...}``. ``fields=id,amount`` narrows both
+    the SELECT and each item. Pages carry an ETag; a matching If-None-Match is
+    answered with 304 from a version-column-only query.
+    """
+    names = parse_fields(fields, CustomerSchema)
+    projection = ",".join(names) if names else None  # Part of the ETag
+    
+    def page(query):
+        if cursor is not None:
+            return keyset_page(query, Customer, cursor, limit)
+        return query.offset(skip).limit(limit)
+    
+    if if_none_match:
+        versions = (await db.execute(page(select(*version_columns(Customer))))).all()
+        following = None
+        if cursor is not None:
+            versions, following = next_cursor(versions, limit)
+        etag = make_etag(versions, following, projection)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    # Column-only rows encoded by orjson; response_model only documents the shape
+    columns = projected_columns(CustomerSchema, Customer, names)
+    rows = (await db.execute(page(select(*columns)))).all()
+    following = None
+    if cursor is not None:
+        rows, following = next_cursor(rows, limit)
+    headers = {"ETag": make_etag(rows, following, projection)}
+    items = rows_to_dicts(rows, names)
+    if cursor is not None:
+        return ORJSONResponse({"items": items, "next_cursor": following}, headers=headers)
+    return ORJSONResponse(items, headers=headers)
+
+@router.get("/search", response_model=List[CustomerSchema])
+async def search_customers(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(auth_service.verify_token)
 ):
-    customers = db.query(Customer).offset(skip).limit(limit).all()
-    return customers
+    """
+    Prefix search over name, code, phone number and email, best matches first.
+    Phone numbers may be typed in any local form ("0712 345 678").
+    """
+    names = parse_fields(fields, CustomerSchema)
+    if not has_search_terms(q):
+        # Punctuation-only queries would be an empty FTS5 MATCH; nothing can match
+        return ORJSONResponse([])
+    columns = projected_columns(CustomerSchema, Customer, names)
+    query = customer_search_query(db.bind.dialect.name, q, columns, limit)
+    rows = (await db.execute(query)).all()
+    return ORJSONResponse(rows_to_dicts(rows, names))
 
 @router.get("/{customer_id}", response_model=CustomerSchema)
 async def get_customer(
     customer_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(auth_service.verify_token)
 ):
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    if if_none_match:
+        version = (await db.execute(
+            select(*version_columns(Customer)).where(Customer.id == customer_id)
+        )).first()
+        if version and etag_matches(if_none_match, make_etag([version])):
+            return not_modified(make_etag([version]))
+    
+    customer = await db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
+    response.headers["ETag"] = make_etag([customer])
     return customer
 
 @router.put("/{customer_id}", response_model=CustomerSchema)
 async def update_customer(
     customer_id: str,
     customer_update: CustomerUpdate,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(auth_service.verify_token)
 ):
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    """
+    One UPDATE ... RETURNING. With If-Match the current version is read first
+    and the UPDATE is conditional on it, so a concurrent write yields 412.
+    """
+    query = update(Customer).where(Customer.id == customer_id)
+    if if_match is not None:
+        version = (await db.execute(
+            select(*version_columns(Customer)).where(Customer.id == customer_id)
+        )).first()
+        if not version:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Customer not found"
+            )
+        require_match(if_match, make_etag([version]))
+        query = query.where(Customer.updated_at == version.updated_at)
+    
+    update_data = customer_update.model_dump(exclude_unset=True)
+    if update_data:
+        customer = await db.scalar(query.values(**update_data).returning(Customer))
+    else:
+        customer = await db.scalar(select(Customer).where(query.whereclause))
     if not customer:
+        await db.rollback()
+        if if_match is not None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Resource has been modified"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
     
-    update_data = customer_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(customer, field, value)
-    
-    db.commit()
-    db.refresh(customer)
+    await db.commit()
+    await customer_cache.invalidate(customer_id)
+    response.headers["ETag"] = make_etag([customer])
     return customer
 
 @router.delete("/{customer_id}")
 async def delete_customer(
     customer_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(auth_service.verify_token)
 ):
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
-    if not customer:
+    # Guarded in SQL so it cannot orphan orders even where FKs are not enforced
+    deleted = await db.scalar(
+        delete(Customer)
+        .where(Customer.id == customer_id, ~exists().where(Order.customer_id == customer_id))
+        .returning(Customer.id)
+    )
+    if not deleted:
+        await db.rollback()
+        if await db.get(Customer, customer_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Customer has orders and cannot be deleted"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
     
-    db.delete(customer)
-    db.commit()
+    await db.commit()
+    await customer_cache.invalidate(customer_id)
     return {"message": "Customer deleted successfully"}
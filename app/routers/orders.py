@@ -1,111 +1,329 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Literal, Optional, Union
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db, get_read_session_factory
 from app.models.order import Order
-from app.models.customer import Customer
-from app.schemas.order import Order as OrderSchema, OrderCreate, OrderUpdate
+from app.models.notification import NotificationOutbox
+from app.schemas.order import Order as OrderSchema, OrderCreate, OrderPage, OrderUpdate
 from app.services.auth import auth_service
+from app.services.customer_cache import customer_cache
+from app.services.etag import (
+    etag_matches, make_etag, not_modified, require_match, version_columns
+)
+from app.services.exporter import MEDIA_TYPES, stream_rows
+from app.services.idempotency import idempotency_keys
+from app.services.pagination import keyset_page, next_cursor
+from app.services.serialization import (
+    ORJSONResponse, parse_fields, projected_columns, rows_to_dicts
+)
+from app.services.rollups import apply_order_deltas
 from app.services.sms import sms_service
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+def order_notification(order: Order, customer) -> dict:
+    """Outbox row for an order confirmation SMS, keyed so each order notifies once"""
+    return {
+        "idempotency_key": f"order-created:{order.id}",
+        "phone_number": sms_service.format_phone_number(customer.phone_number),
+        "message": sms_service.format_order_message(customer.name, order.item,
+                                                    float(order.amount))
+    }
+
 @router.post("/", response_model=OrderSchema, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order: OrderCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user = Depends(auth_service.require_scope("write"))
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(auth_service.require_scope("write")),
+    idempotency_key: Optional[str] = Header(None)
 ):
-    # Verify customer exists
-    customer = db.query(Customer).filter(Customer.id == order.customer_id).first()
+    # A retry with the same Idempotency-Key gets the first response back
+    claim = None
+    if idempotency_key is not None:
+        claim = await idempotency_keys.claim(db, idempotency_key, current_user["sub"],
+                                             "POST /orders", order.model_dump(mode="json"))
+        if claim.replay is not None:
+            return claim.replay
+    
+    # Verify customer exists (and get SMS details) through the read-through cache
+    customer = await customer_cache.get(db, order.customer_id)
     if not customer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
     
-    db_order = Order(**order.model_dump())
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    
-    # Send SMS notification in background
-    background_tasks.add_task(
-        sms_service.send_order_notification,
-        customer.phone_number,
-        customer.name,
-        db_order.item,
-        float(db_order.amount)
-    )
+    try:
+        db_order = await db.scalar(insert(Order).values(**order.model_dump()).returning(Order))
+        
+        # Record the SMS in the outbox within the same transaction as the order
+        await db.execute(
+            insert(NotificationOutbox).values(**order_notification(db_order, customer)))
+        await apply_order_deltas(
+            db, added=[(db_order.customer_id, db_order.time, db_order.amount)])
+        if claim is not None:
+            await idempotency_keys.complete(
+                db, claim, status.HTTP_201_CREATED,
+                OrderSchema.model_validate(db_order).model_dump(mode="json")
+            )
+        await db.commit()
+    except IntegrityError:
+        # The cached customer was deleted since it was cached (possibly by another worker)
+        await db.rollback()
+        await customer_cache.invalidate(order.customer_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found"
+        )
     
     return db_order
 
-@router.get("/", response_model=List[OrderSchema])
+@router.post("/batch", response_model=List[OrderSchema], status_code=status.HTTP_201_CREATED)
+async def create_orders_batch(
+    orders: List[OrderCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(auth_service.require_scope("write"))
+):
+    """
+    Create many orders in one transaction. Customers are resolved through the
+    customer cache, with at most one IN query for the misses; if any is
+    missing nothing is written. Orders and their outbox notifications are
+    inserted with one multi-row statement each.
+    """
+    if len(orders) > settings.ORDER_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ORDER_BATCH_MAX_SIZE} orders per batch"
+        )
+    if not orders:
+        return []
+    
+    customer_ids = {order.customer_id for order in orders}
+    customers = await customer_cache.get_many(db, customer_ids)
+    missing = sorted(customer_ids - customers.keys())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Customer not found: {', '.join(missing)}"
+        )
+    
+    try:
+        result = await db.scalars(
+            insert(Order).returning(Order, sort_by_parameter_order=True),
+            [order.model_dump() for order in orders]
+        )
+        db_orders = result.all()
+        await db.execute(
+            insert(NotificationOutbox),
+            [order_notification(order, customers[order.customer_id]) for order in db_orders]
+        )
+        await apply_order_deltas(
+            db, added=[(order.customer_id, order.time, order.amount) for order in db_orders]
+        )
+        await db.commit()
+    except IntegrityError:
+        # A cached customer was deleted since it was cached; we cannot tell which one
+        await db.rollback()
+        for customer_id in customer_ids:
+            await customer_cache.invalidate(customer_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found"
+        )
+    
+    return db_orders
+
+@router.get("/", response_model=Union[List[OrderSchema], OrderPage])
 async def get_orders(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     customer_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(auth_service.require_scope("write"))
 ):
-    query = db.query(Order)
+    """
+    Offset paging (``skip``) returns a plain list. Passing ``cursor`` (empty for
+    the first page) switches to keyset paging on (created_at, id) and returns
+    ``{"items": [...], "next_cursor": ...}``. ``fields=id,amount`` narrows both
+    the SELECT and each item. Pages carry an ETag; a matching If-None-Match is
+    answered with 304 from a version-column-only query.
+    """
+    names = parse_fields(fields, OrderSchema)
+    projection = ",".join(names) if names else None  # Part of the ETag
+    
+    def page(query):
+        if customer_id:
+            query = query.where(Order.customer_id == customer_id)
+        if cursor is not None:
+            return keyset_page(query, Order, cursor, limit)
+        return query.offset(skip).limit(limit)
+    
+    if if_none_match:
+        versions = (await db.execute(page(select(*version_columns(Order))))).all()
+        following = None
+        if cursor is not None:
+            versions, following = next_cursor(versions, limit)
+        etag = make_etag(versions, following, projection)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    
+    # Column-only rows encoded by orjson; response_model only documents the shape
+    columns = projected_columns(OrderSchema, Order, names)
+    rows = (await db.execute(page(select(*columns)))).all()
+    following = None
+    if cursor is not None:
+        rows, following = next_cursor(rows, limit)
+    headers = {"ETag": make_etag(rows, following, projection)}
+    items = rows_to_dicts(rows, names)
+    if cursor is not None:
+        return ORJSONResponse({"items": items, "next_cursor": following}, headers=headers)
+    return ORJSONResponse(items, headers=headers)
+
+@router.get("/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    customer_id: Optional[str] = None,
+    session_factory = Depends(get_read_session_factory),
+    current_user = Depends(auth_service.require_scope("read"))
+):
+    """
+    Stream every matching order as NDJSON or CSV. ``start``/``end`` bound
+    ``Order.time`` (start inclusive, end exclusive).
+    """
+    query = select(
+        Order.id, Order.customer_id, Order.item, Order.amount, Order.time,
+        Order.description, Order.created_at, Order.updated_at
+    )
+    if start:
+        query = query.where(Order.time >= start)
+    if end:
+        query = query.where(Order.time < end)
     if customer_id:
-        query = query.filter(Order.customer_id == customer_id)
+        query = query.where(Order.customer_id == customer_id)
+    query = query.order_by(Order.created_at, Order.id)
     
-    orders = query.offset(skip).limit(limit).all()
-    return orders
+    return StreamingResponse(
+        stream_rows(session_factory, query, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    )
 
 @router.get("/{order_id}", response_model=OrderSchema)
 async def get_order(
     order_id: str,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(auth_service.require_scope("write"))
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
+    if if_none_match:
+        version = (await db.execute(
+            select(*version_columns(Order)).where(Order.id == order_id)
+        )).first()
+        if version and etag_matches(if_none_match, make_etag([version])):
+            return not_modified(make_etag([version]))
+    
+    order = await db.get(Order, order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
+    response.headers["ETag"] = make_etag([order])
     return order
 
 @router.put("/{order_id}", response_model=OrderSchema)
 async def update_order(
     order_id: str,
     order_update: OrderUpdate,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(auth_service.require_scope("write"))
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
+    """
+    One UPDATE ... RETURNING. The current row is read first only when needed:
+    for If-Match, or when rollups must see the old customer/time/amount. The
+    UPDATE is then conditional on that version (412 / 409 if it moved).
+    """
+    update_data = order_update.model_dump(exclude_unset=True)
+    query = update(Order).where(Order.id == order_id)
+    
+    before = None
+    needs_before = (settings.ANALYTICS_ROLLUP_ENABLED
+                    and update_data.keys() & {"customer_id", "time", "amount"})
+    if if_match is not None or needs_before:
+        before = (await db.execute(
+            select(*version_columns(Order), Order.customer_id, Order.time, Order.amount)
+            .where(Order.id == order_id)
+            .with_for_update()
+        )).first()
+        if not before:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found"
+            )
+        require_match(if_match, make_etag([before]))
+        query = query.where(Order.updated_at == before.updated_at)
+    
+    if update_data:
+        order = await db.scalar(query.values(**update_data).returning(Order))
+    else:
+        order = await db.scalar(select(Order).where(query.whereclause))
     if not order:
+        await db.rollback()
+        if if_match is not None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Resource has been modified"
+            )
+        if before is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Order was modified concurrently; retry"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
     
-    update_data = order_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(order, field, value)
-    
-    db.commit()
-    db.refresh(order)
+    if needs_before:
+        old = (before.customer_id, before.time, before.amount)
+        new = (order.customer_id, order.time, order.amount)
+        if new != old:
+            await apply_order_deltas(db, added=[new], removed=[old])
+    await db.commit()
+    response.headers["ETag"] = make_etag([order])
     return order
 
 @router.delete("/{order_id}")
 async def delete_order(
     order_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(auth_service.require_scope("write"))
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+    deleted = (await db.execute(
+        delete(Order)
+        .where(Order.id == order_id)
+        .returning(Order.customer_id, Order.time, Order.amount)
+    )).first()
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
     
-    db.delete(order)
-    db.commit()
+    await apply_order_deltas(db, removed=[tuple(deleted)])
+    await db.commit()
     return {"message": "Order deleted successfully"}
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional
+
+from app.database import get_read_db
+from app.models.customer import Customer
+from app.schemas.report import CustomerOrderSummary, DailyRevenue
+from app.services.auth import auth_service
+from app.services.rollups import customer_totals_query, daily_revenue_query
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+@router.get("/customers", response_model=List[CustomerOrderSummary])
+async def get_customer_summaries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(auth_service.require_scope("read"))
+):
+    """Order count and revenue per customer, highest revenue first (``end`` inclusive)"""
+    query = customer_totals_query(start, end)
+    query = query.order_by(desc("total_amount"), "customer_id").offset(skip).limit(limit)
+    result = await db.execute(query)
+    return [row._asdict() for row in result.all()]
+
+@router.get("/customers/{customer_id}", response_model=CustomerOrderSummary)
+async def get_customer_summary(
+    customer_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(auth_service.require_scope("read"))
+):
+    if not await db.get(Customer, customer_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Customer not found"
+        )
+    
+    query = customer_totals_query(start, end)
+    query = query.where(query.selected_columns.customer_id == customer_id)
+    row = (await db.execute(query)).first()
+    if row is None:
+        return {"customer_id": customer_id, "order_count": 0, "total_amount": 0.0}
+    return row._asdict()
+
+@router.get("/revenue/daily", response_model=List[DailyRevenue])
+async def get_daily_revenue(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    customer_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user = Depends(auth_service.require_scope("read"))
+):
+    """Order count and revenue per day of ``Order.time`` (``end`` inclusive)"""
+    result = await db.execute(daily_revenue_query(start, end, customer_id))
+    return [row._asdict() for row in result.all()]
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List
 from datetime import datetime
 
+from app.services.phone import to_e164
+
 class CustomerBase(BaseModel):
     name: str
     code: str
@@ -9,12 +11,21 @@ class CustomerBase(BaseModel):
     email: Optional[EmailStr] = None
 
 class CustomerCreate(CustomerBase):
-    pass
+    # Stored in E.164 so search and SMS see one canonical form
+    @field_validator("phone_number")
+    @classmethod
+    def normalize_phone_number(cls, value: str) -> str:
+        return to_e164(value)
 
 class CustomerUpdate(BaseModel):
     name: Optional[str] = None
     phone_number: Optional[str] = None
     email: Optional[EmailStr] = None
+    
+    @field_validator("phone_number")
+    @classmethod
+    def normalize_phone_number(cls, value: Optional[str]) -> Optional[str]:
+        return to_e164(value) if value is not None else value
 
 class Customer(CustomerBase):
     id: str
@@ -23,3 +34,18 @@ class Customer(CustomerBase):
     
     class Config:
         from_attributes = True
+
+class CustomerPage(BaseModel):
+    items: List[Customer]
+    next_cursor: Optional[str] = None
+
+class CustomerImportError(BaseModel):
+    line: int
+    code: Optional[str] = None
+    error: str
+
+class CustomerImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[CustomerImportError]
+    errors_truncated: bool = False
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class OrderBase(BaseModel):
     item: str
@@ -24,3 +24,7 @@ class Order(OrderBase):
     
     class Config:
         from_attributes = True
+
+class OrderPage(BaseModel):
+    items: List[Order]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from datetime import date
+
+class CustomerOrderSummary(BaseModel):
+    customer_id: str
+    order_count: int
+    total_amount: float
+
+class DailyRevenue(BaseModel):
+    day: date
+    order_count: int
+    total_amount: float
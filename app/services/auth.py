@@ -3,49 +3,90 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from jose.exceptions import JWTClaimsError, ExpiredSignatureError
 from datetime import datetime, timedelta
-import httpx
-import json
+import hashlib
+import time
 from typing import Dict, Any, Optional
 from app.config import settings
+from app.services.cache import TTLCache
+from app.services.jwks import JWKSCache
+from app.services.metrics import AUTH_VERIFY_SECONDS
 
 security = HTTPBearer()
 
 class AuthService:
-    def __init__(self):
+    def __init__(self, jwks: Optional[JWKSCache] = None):
         self.issuer = settings.OIDC_ISSUER
         self.client_id = settings.OIDC_CLIENT_ID
-        self.jwks_uri = f"{self.issuer}.well-known/jwks.json"
-        self._jwks_cache = None
-        self._jwks_cache_time = None
+        self.jwks_uri = settings.OIDC_JWKS_URI or f"{self.issuer}.well-known/jwks.json"
+        # Issuer signing keys by kid, shared by every request
+        self.jwks = jwks or JWKSCache(self.jwks_uri)
+        # Validated claims keyed by token digest, each held until its exp
+        self.token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
     
-    async def get_jwks(self) -> Dict[str, Any]:
+    async def get_jwks(self) -> Optional[Dict[str, Any]]:
         """Fetch and cache JWKS from OpenID Connect issuer"""
-        if self._jwks_cache and self._jwks_cache_time and \
-           (datetime.utcnow() - self._jwks_cache_time).seconds < 3600:  # Cache for 1 hour
-            return self._jwks_cache
-        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.jwks_uri)
-                response.raise_for_status()
-                self._jwks_cache = response.json()
-                self._jwks_cache_time = datetime.utcnow()
-                return self._jwks_cache
-        except Exception as e:
-            # Fallback to local verification for demo purposes
+            return await self.jwks.get_jwks()
+        except Exception:
             return None
     
+    async def _signing_key(self, token: str):
+        """
+        Pick the verification key and algorithm for a token.
+
+        Tokens signed with an issuer algorithm (RS256/ES256) are checked against
+        the JWKS key named by their ``kid``; everything else falls back to the
+        local shared secret used by the demo token endpoint.
+        """
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg in settings.OIDC_ALGORITHMS:
+            try:
+                key = await self.jwks.get_key(header.get("kid"))
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Signing keys unavailable"
+                )
+            if key is None or key.get("alg", alg) != alg:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token: unknown signing key"
+                )
+            return key, alg
+        return settings.SECRET_KEY, settings.ALGORITHM
+    
     async def verify_token(self, credentials: HTTPAuthorizationCredentials = Depends(security)):
         """
         Verify JWT token according to OpenID Connect standards
+
+        Successfully verified tokens are cached by SHA-256 digest until their
+        ``exp``, so repeat requests with the same bearer token skip decoding.
         """
+        started = time.perf_counter()
+        cache_key = hashlib.sha256(credentials.credentials.encode()).hexdigest()
+        cached = self.token_cache.get(cache_key)
+        if cached is not None:
+            AUTH_VERIFY_SECONDS.labels("cached").observe(time.perf_counter() - started)
+            return cached
+
+        try:
+            user_info = await self._decode_token(credentials.credentials)
+        except HTTPException:
+            AUTH_VERIFY_SECONDS.labels("rejected").observe(time.perf_counter() - started)
+            raise
+        self.token_cache.set(cache_key, user_info, expires_at=user_info["exp"])
+        AUTH_VERIFY_SECONDS.labels("verified").observe(time.perf_counter() - started)
+        return user_info
+
+    async def _decode_token(self, token: str) -> Dict[str, Any]:
+        """Check signature, lifetime and OIDC claims; returns the user info"""
         try:
-            # For demo purposes, we'll use local verification
-            # In production, you would use the JWKS from the issuer
+            key, algorithm = await self._signing_key(token)
             payload = jwt.decode(
-                credentials.credentials,
-                settings.SECRET_KEY,
-                algorithms=[settings.ALGORITHM],
+                token,
+                key,
+                algorithms=[algorithm],
                 options={
                     "verify_signature": True,
                     "verify_aud": False,  # Skip audience verification for demo
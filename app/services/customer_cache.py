@@ -0,0 +1,193 @@
+from app.config import settings
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.customer import Customer
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedCustomer:
+    """The customer fields the order path needs (existence check and SMS)"""
+    id: str
+    name: str
+    phone_number: str
+
+
+class SharedCacheBackend:
+    """Interface for a cache tier shared between workers (e.g. Redis)"""
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+
+class InMemoryCacheBackend(SharedCacheBackend):
+    """Process-local stand-in for the shared tier, used in tests and single-worker setups"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[str, float]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._data[key] = (value, time.time() + ttl)
+
+    async def delete(self, key: str):
+        self._data.pop(key, None)
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    """Shared tier on Redis; requires the optional ``redis`` package"""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CUSTOMER_CACHE_SHARED_URL requires the 'redis' package")
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._client.set(key, value, ex=max(int(ttl), 1))
+
+    async def delete(self, key: str):
+        await self._client.delete(key)
+
+
+class CustomerCache:
+    """
+    Read-through cache of customer lookups for the order hot path.
+
+    Lookups try the in-process LRU/TTL tier, then the optional shared tier,
+    then the database. Writers call ``invalidate`` after committing; other
+    workers' local tiers converge within ``ttl``. Shared-tier failures are
+    logged and treated as misses so the cache never fails a request.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[float] = None,
+                 shared: Optional[SharedCacheBackend] = None):
+        self.ttl = settings.CUSTOMER_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.local = TTLCache(
+            maxsize=settings.CUSTOMER_CACHE_MAX_SIZE if maxsize is None else maxsize,
+            ttl=self.ttl
+        )
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.db_loads = 0
+
+    @staticmethod
+    def _key(customer_id: str) -> str:
+        return f"customer:{customer_id}"
+
+    async def _shared_get(self, customer_id: str) -> Optional[CachedCustomer]:
+        if self.shared is None:
+            return None
+        try:
+            raw = await self.shared.get(self._key(customer_id))
+        except Exception as e:
+            logger.warning("Shared customer cache read failed: %s", str(e))
+            raw = None
+        if raw is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        return CachedCustomer(**json.loads(raw))
+
+    async def _store(self, customer: CachedCustomer):
+        self.local.set(customer.id, customer)
+        if self.shared is not None:
+            try:
+                await self.shared.set(self._key(customer.id), json.dumps(asdict(customer)),
+                                      self.ttl)
+            except Exception as e:
+                logger.warning("Shared customer cache write failed: %s", str(e))
+
+    async def get(self, db: AsyncSession, customer_id: str) -> Optional[CachedCustomer]:
+        customers = await self.get_many(db, [customer_id])
+        return customers.get(customer_id)
+
+    async def get_many(self, db: AsyncSession,
+                       customer_ids: Iterable[str]) -> Dict[str, CachedCustomer]:
+        """Resolve customers by id; misses across both tiers cost one IN query"""
+        found: Dict[str, CachedCustomer] = {}
+        missing = []
+        for customer_id in set(customer_ids):
+            customer = self.local.get(customer_id)
+            if customer is None:
+                customer = await self._shared_get(customer_id)
+                if customer is not None:
+                    self.local.set(customer_id, customer)
+            if customer is None:
+                missing.append(customer_id)
+            else:
+                found[customer_id] = customer
+
+        if missing:
+            self.db_loads += 1
+            result = await db.execute(
+                select(Customer.id, Customer.name, Customer.phone_number)
+                .where(Customer.id.in_(missing))
+            )
+            for row in result.all():
+                customer = CachedCustomer(row.id, row.name, row.phone_number)
+                await self._store(customer)
+                found[customer.id] = customer
+        return found
+
+    async def invalidate(self, customer_id: str):
+        self.local.pop(customer_id)
+        if self.shared is not None:
+            try:
+                await self.shared.delete(self._key(customer_id))
+            except Exception as e:
+                logger.warning("Shared customer cache delete failed: %s", str(e))
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, float]:
+        local = self.local.stats()
+        lookups = local["hits"] + local["misses"]
+        hits = local["hits"] + self.shared_hits
+        return {
+            "local_hits": local["hits"],
+            "local_misses": local["misses"],
+            "local_size": local["size"],
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses,
+            "db_loads": self.db_loads,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+def _shared_backend() -> Optional[SharedCacheBackend]:
+    if settings.CUSTOMER_CACHE_SHARED_URL:
+        return RedisCacheBackend(settings.CUSTOMER_CACHE_SHARED_URL)
+    return None
+
+
+customer_cache = CustomerCache(shared=_shared_backend())
@@ -0,0 +1,53 @@
+from fastapi import HTTPException, Response, status
+import hashlib
+from typing import Any, Iterable, Optional
+
+
+def version_columns(model):
+    """The columns an ETag is derived from, for cheap column-only lookups"""
+    return (model.id, model.created_at, model.updated_at)
+
+
+def make_etag(rows: Iterable[Any], *extra: Optional[str]) -> str:
+    """
+    Strong ETag over (id, updated_at or created_at) of each row, in order.
+    ``extra`` folds in anything else the representation depends on (e.g. the
+    next page cursor).
+    """
+    digest = hashlib.sha1()
+    for row in rows:
+        version = row.updated_at or row.created_at
+        digest.update(f"{row.id}|{version.isoformat() if version else ''};".encode())
+    for part in extra:
+        digest.update(f"{part or ''};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """Whether an If-None-Match (weak) or If-Match (strong) header matches ``etag``"""
+    if header is None:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def require_match(if_match: Optional[str], etag: str):
+    """Optimistic concurrency: reject a write whose If-Match is stale"""
+    if if_match is not None and not etag_matches(if_match, etag, weak=False):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource has been modified"
+        )
@@ -0,0 +1,57 @@
+from app.config import settings
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(columns: List[str], rows: Sequence) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows
+    ).encode()
+
+
+def _encode_csv(rows: Sequence) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+async def stream_rows(session_factory: async_sessionmaker, query, format: str,
+                      chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Stream a column select as NDJSON or CSV.
+
+    Rows come from a server-side cursor ``chunk_size`` at a time and each chunk
+    is encoded and written before the next is fetched, so memory stays flat
+    regardless of how many rows match. The session is opened here because the
+    response body is produced after the request handler has returned.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    columns = [column.name for column in query.selected_columns]
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        if format == "csv":
+            yield _encode_csv([columns])
+        async for rows in result.partitions():
+            if format == "csv":
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(columns, rows)
@@ -0,0 +1,157 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+import orjson
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.idempotency import IdempotencyRecord
+from app.services.serialization import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+COMPACTION_BATCH_SIZE = 1000
+
+
+@dataclass
+class IdempotencyClaim:
+    """Outcome of ``claim``: run the request (``replay`` is None) or return ``replay``"""
+    record_id: str
+    replay: Optional[ORJSONResponse] = None
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+class IdempotencyKeys:
+    """
+    ``Idempotency-Key`` handling for create endpoints.
+
+    ``claim`` inserts the key as the first statement of the request's own
+    transaction and ``complete`` stores the response before that transaction
+    commits, so the key and the created rows are committed (or rolled back)
+    together. A duplicate sent while the first request is in flight blocks on
+    the key's unique index (the SQLite write lock, or the Postgres index
+    entry) until the first commits, then replays its response instead of
+    running again. If the first request fails, nothing is stored and the retry
+    runs normally. Keys are scoped to the caller and endpoint, and expire
+    after ``ttl`` seconds; ``compact`` deletes expired ones.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.IDEMPOTENCY_TTL_SECONDS if ttl is None else ttl
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def claim(self, db: AsyncSession, key: str, caller: str, endpoint: str,
+                    payload: Dict[str, Any]) -> IdempotencyClaim:
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+            )
+        record_id = _digest(caller, endpoint, key)
+        request_hash = hashlib.sha256(
+            orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+        # Second attempt only after removing an expired record compaction has not reached yet
+        for _ in range(2):
+            now = datetime.utcnow()
+            try:
+                await db.execute(insert(IdempotencyRecord).values(
+                    id=record_id, request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=self.ttl)
+                ))
+                return IdempotencyClaim(record_id)
+            except IntegrityError:
+                await db.rollback()
+
+            stored = (await db.execute(
+                select(IdempotencyRecord.request_hash, IdempotencyRecord.response_status,
+                       IdempotencyRecord.response_body, IdempotencyRecord.expires_at)
+                .where(IdempotencyRecord.id == record_id)
+            )).first()
+            if stored is None or stored.expires_at <= now:
+                await db.execute(delete(IdempotencyRecord).where(
+                    IdempotencyRecord.id == record_id, IdempotencyRecord.expires_at <= now
+                ))
+                continue
+            if stored.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            if stored.response_body is None:
+                break
+            await db.rollback()  # End the read transaction before the session is reused
+            return IdempotencyClaim(record_id, replay=ORJSONResponse(
+                content=orjson.loads(stored.response_body),
+                status_code=stored.response_status,
+                headers={REPLAYED_HEADER: "true"}
+            ))
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+
+    async def complete(self, db: AsyncSession, claim: IdempotencyClaim, status_code: int,
+                       body: Any):
+        """Store the response in the claiming transaction; the caller commits"""
+        await db.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.id == claim.record_id)
+            .values(response_status=status_code, response_body=orjson.dumps(body).decode())
+        )
+
+    async def compact(self, db: AsyncSession, now: Optional[datetime] = None) -> int:
+        """Delete expired keys in small batches so writers are not blocked for long"""
+        now = now or datetime.utcnow()
+        deleted = 0
+        while True:
+            expired = (
+                select(IdempotencyRecord.id)
+                .where(IdempotencyRecord.expires_at <= now)
+                .limit(COMPACTION_BATCH_SIZE)
+            )
+            result = await db.execute(
+                delete(IdempotencyRecord).where(IdempotencyRecord.id.in_(expired))
+            )
+            await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < COMPACTION_BATCH_SIZE:
+                return deleted
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run_compaction(self, session_factory: async_sessionmaker,
+                             interval: Optional[float] = None):
+        """Compact every ``interval`` seconds until ``stop`` is called"""
+        interval = interval or settings.IDEMPOTENCY_COMPACTION_INTERVAL_SECONDS
+        self._stopping = asyncio.Event()
+        while not self._stopping.is_set():
+            try:
+                async with session_factory() as db:
+                    deleted = await self.compact(db)
+                if deleted:
+                    logger.info("Compacted %d expired idempotency keys", deleted)
+            except Exception as e:
+                logger.error("Idempotency key compaction failed: %s", str(e))
+            try:
+                await asyncio.wait_for(self._stopping.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+idempotency_keys = IdempotencyKeys()
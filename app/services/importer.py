@@ -0,0 +1,174 @@
+from app.config import settings
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.customer import Customer
+from app.schemas.customer import CustomerCreate
+
+Record = Tuple[int, Union[Dict[str, Any], str]]  # (line, fields or parse error)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "Expected a JSON object"
+            continue
+        yield line_no, record
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """
+    Parse CSV records as lines arrive. A record whose quotes are unbalanced
+    continues on the next line (quoted newlines); the first record is the header.
+    """
+    header: Optional[List[str]] = None
+    line_no = 0
+    start_line = 0
+    pending = ""
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not pending:
+            start_line = line_no
+            if not line.strip():
+                continue
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+
+        fields = next(csv.reader([pending]))
+        pending = ""
+        if header is None:
+            header = [field.strip() for field in fields]
+            continue
+        if len(fields) != len(header):
+            yield start_line, f"Expected {len(header)} columns, found {len(fields)}"
+            continue
+        yield start_line, {key: value for key, value in zip(header, fields) if value != ""}
+
+    if pending:
+        yield start_line, "Unterminated quoted field"
+
+
+class CustomerImporter:
+    """
+    Set-based bulk insert of customer records.
+
+    Records are validated and buffered ``batch_size`` at a time. Each batch
+    checks ``code`` uniqueness with one ``IN`` query, inserts the survivors
+    with a single executemany ``INSERT`` and commits, so memory is bounded by
+    the batch, not the upload.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: Optional[int] = None,
+                 max_errors: Optional[int] = None):
+        self.db = db
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.max_errors = settings.IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def _error(self, line: int, error: str, code: Optional[str] = None):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "code": code, "error": error})
+
+    async def run(self, records: AsyncIterator[Record]) -> Dict[str, Any]:
+        batch: List[Tuple[int, CustomerCreate]] = []
+        async for line, record in records:
+            if isinstance(record, str):
+                self._error(line, record)
+                continue
+            try:
+                customer = CustomerCreate(**record)
+            except (ValidationError, TypeError) as e:
+                code = record.get("code")
+                # Echo the code back as text; NDJSON may carry numbers or objects here
+                self._error(line, _describe(e), None if code is None else str(code))
+                continue
+            batch.append((line, customer))
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        if batch:
+            await self._flush(batch)
+
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+    async def _flush(self, batch: List[Tuple[int, CustomerCreate]]):
+        codes = {customer.code for _, customer in batch}
+        existing = set((await self.db.scalars(
+            select(Customer.code).where(Customer.code.in_(codes))
+        )).all())
+
+        rows: List[Tuple[int, Dict[str, Any]]] = []
+        for line, customer in batch:
+            if customer.code in existing:
+                self._error(line, "Customer with this code already exists", customer.code)
+                continue
+            existing.add(customer.code)  # Later duplicates in the same batch
+            rows.append((line, customer.model_dump()))
+        if not rows:
+            return
+
+        try:
+            await self.db.execute(insert(Customer), [values for _, values in rows])
+            await self.db.commit()
+            self.created += len(rows)
+        except IntegrityError:
+            # A concurrent writer took one of the codes; retry row by row
+            await self.db.rollback()
+            await self._insert_individually(rows)
+
+    async def _insert_individually(self, rows: List[Tuple[int, Dict[str, Any]]]):
+        for line, values in rows:
+            try:
+                await self.db.execute(insert(Customer), [values])
+                await self.db.commit()
+                self.created += 1
+            except IntegrityError:
+                await self.db.rollback()
+                self._error(line, "Customer with this code already exists", values["code"])
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+            for item in error.errors()
+        )
+    return str(error)
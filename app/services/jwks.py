@@ -0,0 +1,111 @@
+from app.config import settings
+import asyncio
+import httpx
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    """
+    Signing keys from the issuer's JWKS endpoint, indexed by ``kid``.
+
+    - One pooled ``httpx.AsyncClient`` is reused for every fetch.
+    - Fetches are single-flight: concurrent callers share one in-flight request.
+    - Once a key set is within ``refresh_ahead`` seconds of expiry, the next
+      lookup schedules a background refresh and is still served from cache.
+    - An unknown ``kid`` (key rotation) forces a refetch, at most once per
+      ``min_refetch_interval``, so a burst of tokens with a bad ``kid`` cannot
+      stampede the issuer.
+    - If a refresh fails the previous keys are kept (serve stale).
+    """
+
+    def __init__(self, jwks_uri: str, ttl: Optional[float] = None,
+                 refresh_ahead: Optional[float] = None,
+                 min_refetch_interval: Optional[float] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.jwks_uri = jwks_uri
+        self.ttl = settings.JWKS_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.refresh_ahead = (settings.JWKS_REFRESH_AHEAD_SECONDS
+                              if refresh_ahead is None else refresh_ahead)
+        self.min_refetch_interval = (settings.JWKS_MIN_REFETCH_SECONDS
+                                     if min_refetch_interval is None else min_refetch_interval)
+        self.fetch_count = 0
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._jwks: Optional[Dict[str, Any]] = None
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=settings.JWKS_HTTP_TIMEOUT,
+                headers={"Accept": "application/json"}
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+        self._inflight = None
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    async def _fetch(self) -> Dict[str, Any]:
+        self.fetch_count += 1
+        try:
+            response = await self._get_client().get(self.jwks_uri)
+            response.raise_for_status()
+            jwks = response.json()
+        except Exception as e:
+            if self._jwks is None:
+                raise
+            logger.warning("JWKS refresh failed, keeping cached keys: %s", str(e))
+            # Back off before the next attempt instead of retrying every request
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + self.min_refetch_interval
+            return self._jwks
+
+        self._jwks = jwks
+        self._keys = {key["kid"]: key for key in jwks.get("keys", []) if "kid" in key}
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + self.ttl
+        return jwks
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Fetch the key set, joining any fetch that is already in flight"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+        return await asyncio.shield(self._inflight)
+
+    def _refresh_in_background(self):
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+            # Failures are logged by _fetch; retrieve so asyncio does not warn
+            self._inflight.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def get_jwks(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self._jwks is None or now >= self._expires_at:
+            return await self.refresh()
+        if now >= self._expires_at - self.refresh_ahead:
+            self._refresh_in_background()
+        return self._jwks
+
+    async def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the JWK for ``kid``, refetching once if it is not known yet"""
+        await self.get_jwks()
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at >= self.min_refetch_interval:
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
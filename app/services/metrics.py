@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Prometheus text exposition format served by GET /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# No *_created series; nothing here alerts on counter resets
+disable_created_metrics()
+
+# Our own registry rather than the global default, so /metrics carries only app metrics
+registry = CollectorRegistry()
+
+
+def render(target: CollectorRegistry = registry) -> str:
+    return generate_latest(target).decode("utf-8")
+
+
+class CacheCollector:
+    """
+    Scrape-time collector for ``TTLCache.stats()``-shaped dicts (hits and
+    misses; optionally size, evictions, loads from the backing store and an
+    overall hit rate), keyed by the ``cache`` label.
+    """
+
+    def __init__(self, caches: Dict[str, Callable[[], Dict[str, float]]]):
+        self.caches = caches
+
+    def collect(self):
+        hits = CounterMetricFamily("app_cache_hits_total", "Cache lookups served from the cache",
+                                   labels=["cache"])
+        misses = CounterMetricFamily("app_cache_misses_total", "Cache lookups that missed",
+                                     labels=["cache"])
+        evictions = CounterMetricFamily("app_cache_evictions_total", "Entries evicted when full",
+                                        labels=["cache"])
+        loads = CounterMetricFamily("app_cache_loads_total",
+                                    "Lookups that missed every cache tier and hit the database",
+                                    labels=["cache"])
+        size = GaugeMetricFamily("app_cache_entries", "Entries currently cached",
+                                 labels=["cache"])
+        hit_rate = GaugeMetricFamily("app_cache_hit_ratio",
+                                     "Fraction of lookups served from any cache tier",
+                                     labels=["cache"])
+        optional = {"evictions": evictions, "db_loads": loads, "size": size,
+                    "hit_rate": hit_rate}
+        for name, stats_fn in self.caches.items():
+            stats = stats_fn()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            for key, family in optional.items():
+                if key in stats:
+                    family.add_metric([name], stats[key])
+        return [hits, misses, evictions, loads, size, hit_rate]
+
+
+@dataclass
+class QueryStats:
+    """Statements run on behalf of one request"""
+    count: int = 0
+    seconds: float = 0.0
+
+
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Attribute queries run in this context (and tasks it starts) to one QueryStats"""
+    stats = QueryStats()
+    token = _request_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_queries.reset(token)
+
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:8].split(None, 1)
+    verb = verb[0].upper() if verb else ""
+    return verb if verb in _OPERATIONS else "OTHER"
+
+
+def record_query(statement: str, seconds: float):
+    # Children resolved up front; labels() costs as much as the observation itself
+    _DB_QUERY_SECONDS_BY_OPERATION[_operation(statement)].observe(seconds)
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ["method", "route", "status"], registry=registry)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS, registry=registry)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", registry=registry)
+HTTP_REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Database statements per HTTP request", ["route"],
+    buckets=COUNT_BUCKETS, registry=registry)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time per HTTP request spent in database statements", ["route"],
+    buckets=QUERY_BUCKETS + (2.5, 5.0), registry=registry)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Database statement latency", ["operation"],
+    buckets=QUERY_BUCKETS, registry=registry)
+_DB_QUERY_SECONDS_BY_OPERATION = {
+    operation: DB_QUERY_SECONDS.labels(operation) for operation in _OPERATIONS + ("OTHER",)
+}
+AUTH_VERIFY_SECONDS = Histogram(
+    "auth_verify_duration_seconds",
+    "Bearer token verification time; result is cached, verified or rejected", ["result"],
+    buckets=QUERY_BUCKETS, registry=registry)
+SMS_REQUEST_SECONDS = Histogram(
+    "sms_request_duration_seconds", "Africa's Talking API request latency", ["outcome"],
+    buckets=LATENCY_BUCKETS, registry=registry)
+OUTBOX_BATCH_SIZE = Histogram(
+    "outbox_batch_size", "Notifications claimed per outbox batch",
+    buckets=COUNT_BUCKETS + (200, 500), registry=registry)
+OUTBOX_BATCH_GROUPS = Histogram(
+    "outbox_batch_groups", "Distinct message bodies per outbox batch",
+    buckets=COUNT_BUCKETS + (200, 500), registry=registry)
+OUTBOX_SMS_REQUESTS = Counter(
+    "outbox_sms_requests_total", "Africa's Talking requests made by the outbox worker",
+    registry=registry)
+OUTBOX_FAILED_RECIPIENTS = Counter(
+    "outbox_failed_recipients_total", "Outbox recipients not accepted by Africa's Talking",
+    registry=registry)
+RATE_LIMITED = Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by the per-client limiter",
+    ["scope"], registry=registry)
+ADMISSION_SHED = Counter(
+    "admission_shed_requests_total", "Requests shed with 503 by admission control", ["reason"],
+    registry=registry)
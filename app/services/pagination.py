@@ -0,0 +1,49 @@
+from fastapi import HTTPException, status
+from datetime import datetime
+import base64
+import json
+from typing import Any, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Build the opaque cursor pointing just past (created_at, id)"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int):
+    """
+    Apply (created_at, id) keyset ordering to a select.
+
+    An empty cursor starts from the beginning. One extra row is fetched so the
+    caller can tell whether another page exists (see ``next_cursor``).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(or_(
+            model.created_at > created_at,
+            and_(model.created_at == created_at, model.id > row_id)
+        ))
+    return query.order_by(model.created_at, model.id).limit(limit + 1)
+
+
+def next_cursor(rows: Sequence[Any], limit: int) -> Tuple[Sequence[Any], Optional[str]]:
+    """Trim the look-ahead row and return (page, cursor for the following page)"""
+    if len(rows) <= limit or limit <= 0:
+        return rows[:max(limit, 0)], None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,39 @@
+import re
+
+KENYA_COUNTRY_CODE = "254"
+_SEPARATORS = re.compile(r"[\s\-().]")
+
+
+def to_e164(phone_number: str, country_code: str = KENYA_COUNTRY_CODE) -> str:
+    """
+    Normalise a phone number to E.164 with the rules the SMS sender has always
+    applied: numbers with a '+' are international, a leading 0 is the national
+    trunk prefix, and anything else is a national number. Separators are
+    dropped, and a bare ``254`` + 9-digit number is not prefixed twice.
+    """
+    cleaned = _SEPARATORS.sub("", phone_number)
+    if cleaned.startswith("+"):
+        return cleaned
+    if cleaned.startswith("0"):
+        return f"+{country_code}{cleaned[1:]}"
+    if cleaned.startswith(country_code) and len(cleaned) == len(country_code) + 9:
+        return f"+{cleaned}"
+    return f"+{country_code}{cleaned}"
+
+
+def to_e164_prefix(partial: str, country_code: str = KENYA_COUNTRY_CODE) -> str:
+    """
+    E.164 form of the start of a phone number, for search. Unlike ``to_e164``
+    a leading country code is recognised at any length ("254712" is
+    "+254712"); national numbers never start with it.
+    """
+    cleaned = _SEPARATORS.sub("", partial)
+    if cleaned.startswith(country_code):
+        return f"+{cleaned}"
+    return to_e164(cleaned, country_code)
+
+
+def looks_like_phone_number(query: str) -> bool:
+    """Whether a search query is a (partial) phone number rather than text"""
+    cleaned = _SEPARATORS.sub("", query)
+    return bool(re.fullmatch(r"\+?\d+", cleaned))
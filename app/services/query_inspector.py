@@ -0,0 +1,110 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+import threading
+from typing import Dict, Iterator, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists ("IN (?, ?, ?)", "IN ($1, $2)") differ only in length
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:\?|%s|\$\d+|:\w+)\s*,?)+\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    A statement with whitespace, literals and IN-list lengths normalised, so
+    the same query issued once per row (an N+1 load) has one shape.
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERAL.sub("?", shape)
+    return _IN_LIST.sub("IN (...)", shape)
+
+
+class QueryLog:
+    """Statements seen while a recorder or request inspection was active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, statement: str):
+        with self._lock:
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, int]:
+        """Statement shapes issued at least ``threshold`` times, most frequent first"""
+        shapes = Counter(statement_shape(statement) for statement in self.statements)
+        return {shape: n for shape, n in shapes.most_common() if n >= threshold}
+
+    def report(self) -> str:
+        lines = [f"{self.count} statement(s):"]
+        lines.extend(f"  {i}. {_WHITESPACE.sub(' ', s).strip()}"
+                     for i, s in enumerate(self.statements, 1))
+        repeated = self.repeated()
+        if repeated:
+            lines.append("Repeated shapes:")
+            lines.extend(f"  {n} x {shape}" for shape, n in repeated.items())
+        return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# Process-wide recorders see every statement on every instrumented engine, so
+# tests can wrap a TestClient call even though the app runs on another thread
+_recorders: List[QueryLog] = []
+_request_log: ContextVar[Optional[QueryLog]] = ContextVar("request_query_log", default=None)
+
+
+def inspect_statement(statement: str):
+    """Called for every statement (``before_cursor_execute``); a no-op unless recording"""
+    log = _request_log.get()
+    if log is not None:
+        log.add(statement)
+    for recorder in _recorders:
+        recorder.add(statement)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryLog]:
+    """Collect every statement run anywhere in the process until the block exits"""
+    log = QueryLog()
+    _recorders.append(log)
+    try:
+        yield log
+    finally:
+        _recorders.remove(log)
+
+
+@contextmanager
+def inspect_request() -> Iterator[QueryLog]:
+    """Collect the statements run in this context, i.e. by one request"""
+    log = QueryLog()
+    token = _request_log.set(log)
+    try:
+        yield log
+    finally:
+        _request_log.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget: int, allow_repeats: bool = False) -> Iterator[QueryLog]:
+    """
+    Fail if the block runs more than ``budget`` statements or, unless
+    ``allow_repeats``, the same statement shape more than once::
+
+        with assert_max_queries(1):
+            client.get("/api/v1/orders/", headers=auth_headers)
+    """
+    with record_queries() as log:
+        yield log
+    if log.count > budget:
+        raise QueryBudgetExceeded(f"Query budget of {budget} exceeded\n{log.report()}")
+    if not allow_repeats and log.repeated():
+        raise QueryBudgetExceeded(f"Repeated statements (possible N+1)\n{log.report()}")
@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+import logging
+import math
+import time
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.config import settings
+from app.database import SAFE_METHODS
+from app.services.auth import auth_service
+from app.services.cache import TTLCache
+from app.services.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    rate: float  # Tokens added per second
+    burst: int  # Bucket capacity: requests allowed at once after an idle spell
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: int
+    retry_after: float  # Seconds until the next token; 0 when allowed
+
+
+class RateLimitBackend:
+    """Interface for token-bucket state shared between workers (e.g. Redis)"""
+
+    async def take(self, key: str, policy: BucketPolicy, cost: int = 1) -> RateLimitDecision:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process buckets. Each worker enforces the limits on its own, so with
+    N workers a client gets up to N times the configured rate.
+    """
+
+    def __init__(self, max_clients: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        # A bucket idle long enough to refill is the same as no bucket, so it may expire
+        self._buckets = TTLCache(maxsize=max_clients, clock=clock)
+
+    async def take(self, key: str, policy: BucketPolicy, cost: int = 1) -> RateLimitDecision:
+        now = self.clock()
+        tokens, updated = self._buckets.get(key, (float(policy.burst), now))
+        tokens = min(float(policy.burst), tokens + (now - updated) * policy.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets.set(key, (tokens, now), ttl=policy.burst / policy.rate)
+        retry_after = 0.0 if allowed else (cost - tokens) / policy.rate
+        return RateLimitDecision(allowed, int(tokens), retry_after)
+
+
+# Refill and take atomically on the Redis side, using the server clock
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker; requires the optional ``redis`` package"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_SHARED_URL requires the 'redis' package")
+        self._client = redis.from_url(url, decode_responses=True)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self.prefix = prefix
+
+    async def take(self, key: str, policy: BucketPolicy, cost: int = 1) -> RateLimitDecision:
+        allowed, tokens = await self._script(keys=[self.prefix + key],
+                                             args=[policy.rate, policy.burst, cost])
+        tokens = float(tokens)
+        retry_after = 0.0 if allowed else (cost - tokens) / policy.rate
+        return RateLimitDecision(bool(allowed), int(tokens), retry_after)
+
+
+class RateLimiter:
+    """
+    Token buckets per token subject, one for reads (GET/HEAD/OPTIONS) and one
+    for writes, so a client polling lists cannot starve its own order writes.
+    Limits are read from the RATE_LIMIT_* settings on every check.
+    """
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self.backend = backend or InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_CLIENTS)
+
+    @staticmethod
+    def policy(scope: str) -> BucketPolicy:
+        if scope == "read":
+            return BucketPolicy(settings.RATE_LIMIT_READ_PER_SECOND, settings.RATE_LIMIT_READ_BURST)
+        return BucketPolicy(settings.RATE_LIMIT_WRITE_PER_SECOND, settings.RATE_LIMIT_WRITE_BURST)
+
+    async def check(self, subject: str, scope: str) -> RateLimitDecision:
+        policy = self.policy(scope)
+        try:
+            return await self.backend.take(f"{scope}:{subject}", policy)
+        except Exception as e:
+            # A shared store outage must not take the API down with it
+            logger.warning("Rate limit backend failed, allowing request: %s", str(e))
+            return RateLimitDecision(True, policy.burst, 0.0)
+
+    async def enforce(self, subject: str, scope: str):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        decision = await self.check(subject, scope)
+        if decision.allowed:
+            return
+        RATE_LIMITED.labels(scope).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded for {scope} requests",
+            headers={
+                "Retry-After": str(max(1, math.ceil(decision.retry_after))),
+                "RateLimit-Limit": str(self.policy(scope).burst),
+                "RateLimit-Remaining": "0",
+            }
+        )
+
+
+def _backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_SHARED_URL:
+        return RedisRateLimitBackend(settings.RATE_LIMIT_SHARED_URL)
+    return InMemoryRateLimitBackend(settings.RATE_LIMIT_MAX_CLIENTS)
+
+
+rate_limiter = RateLimiter(_backend())
+
+
+async def enforce_rate_limit(request: Request, user_info=Depends(auth_service.verify_token)):
+    """Router dependency; shares the request's cached ``verify_token`` result"""
+    scope = "read" if request.method in SAFE_METHODS else "write"
+    await rate_limiter.enforce(user_info["sub"], scope)
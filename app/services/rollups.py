@@ -0,0 +1,163 @@
+"""
+Order analytics queries and the optional ``order_daily_rollups`` table.
+
+Rollup deltas are only recorded while ANALYTICS_ROLLUP_ENABLED is on, so
+backfill the table whenever the flag is switched on (and to repair drift):
+
+    python -m app.services.rollups
+"""
+from app.config import settings
+import argparse
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import AsyncSessionLocal
+from app.models.order import Order
+from app.models.rollup import OrderDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# (customer_id, order time, amount)
+OrderFacts = Tuple[str, datetime, float]
+
+
+def _upsert(dialect_name: str):
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = dialect_insert(OrderDailyRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[OrderDailyRollup.customer_id, OrderDailyRollup.day],
+        set_={
+            "order_count": OrderDailyRollup.order_count + stmt.excluded.order_count,
+            "total_amount": OrderDailyRollup.total_amount + stmt.excluded.total_amount,
+        }
+    )
+
+
+async def apply_order_deltas(db: AsyncSession, added: Iterable[OrderFacts] = (),
+                             removed: Iterable[OrderFacts] = ()):
+    """
+    Fold order inserts/deletes into ``order_daily_rollups`` within the caller's
+    transaction. An update is a removal of the old facts plus an addition of
+    the new ones. No-op unless ANALYTICS_ROLLUP_ENABLED.
+    """
+    if not settings.ANALYTICS_ROLLUP_ENABLED:
+        return
+
+    deltas: Dict[Tuple[str, date], list] = defaultdict(lambda: [0, 0.0])
+    for sign, facts in ((1, added), (-1, removed)):
+        for customer_id, time, amount in facts:
+            delta = deltas[(customer_id, time.date())]
+            delta[0] += sign
+            delta[1] += sign * float(amount)
+
+    rows = [
+        {"customer_id": customer_id, "day": day, "order_count": count, "total_amount": amount}
+        for (customer_id, day), (count, amount) in deltas.items()
+        if count or amount
+    ]
+    if rows:
+        await db.execute(_upsert(db.bind.dialect.name), rows)
+
+
+async def rebuild_rollups(db: AsyncSession):
+    """Recompute every rollup from the orders table (backfill after enabling)"""
+    await db.execute(delete(OrderDailyRollup))
+    await db.execute(insert(OrderDailyRollup).from_select(
+        ["customer_id", "day", "order_count", "total_amount"],
+        select(Order.customer_id, func.date(Order.time), func.count(), func.sum(Order.amount))
+        .group_by(Order.customer_id, func.date(Order.time))
+    ))
+    await db.commit()
+
+
+def customer_totals_query(start: Optional[date] = None, end: Optional[date] = None):
+    """Per-customer order count and revenue, from rollups or GROUP BY over orders"""
+    if settings.ANALYTICS_ROLLUP_ENABLED:
+        source = OrderDailyRollup
+        query = select(
+            source.customer_id,
+            func.sum(source.order_count).label("order_count"),
+            func.sum(source.total_amount).label("total_amount"),
+        )
+        query = _rollup_range(query, start, end)
+        return query.group_by(source.customer_id).having(func.sum(source.order_count) > 0)
+
+    query = select(
+        Order.customer_id,
+        func.count().label("order_count"),
+        func.sum(Order.amount).label("total_amount"),
+    )
+    query = _order_range(query, start, end)
+    return query.group_by(Order.customer_id)
+
+
+def daily_revenue_query(start: Optional[date] = None, end: Optional[date] = None,
+                        customer_id: Optional[str] = None):
+    """Order count and revenue per calendar day of ``Order.time``"""
+    if settings.ANALYTICS_ROLLUP_ENABLED:
+        source = OrderDailyRollup
+        query = select(
+            source.day,
+            func.sum(source.order_count).label("order_count"),
+            func.sum(source.total_amount).label("total_amount"),
+        )
+        if customer_id:
+            query = query.where(source.customer_id == customer_id)
+        query = _rollup_range(query, start, end)
+        return (query.group_by(source.day)
+                .having(func.sum(source.order_count) > 0)
+                .order_by(source.day))
+
+    day = func.date(Order.time).label("day")
+    query = select(
+        day,
+        func.count().label("order_count"),
+        func.sum(Order.amount).label("total_amount"),
+    )
+    if customer_id:
+        query = query.where(Order.customer_id == customer_id)
+    query = _order_range(query, start, end)
+    return query.group_by(day).order_by(day)
+
+
+def _rollup_range(query, start: Optional[date], end: Optional[date]):
+    if start:
+        query = query.where(OrderDailyRollup.day >= start)
+    if end:
+        query = query.where(OrderDailyRollup.day <= end)
+    return query
+
+
+def _order_range(query, start: Optional[date], end: Optional[date]):
+    # Whole days, inclusive of end, as a sargable range on Order.time
+    if start:
+        query = query.where(Order.time >= datetime.combine(start, datetime.min.time()))
+    if end:
+        query = query.where(
+            Order.time < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+async def _main(session_factory: async_sessionmaker = AsyncSessionLocal):
+    async with session_factory() as db:
+        await rebuild_rollups(db)
+        rows = await db.scalar(select(func.count()).select_from(OrderDailyRollup))
+    logger.info("Rebuilt order_daily_rollups: %d customer-day rows", rows)
+
+
+def main():
+    argparse.ArgumentParser(
+        description="Recompute order_daily_rollups from the orders table"
+    ).parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import re
+from typing import Any, List
+from sqlalchemy import column, func, literal_column, or_, select, table
+
+from app.models.customer import Customer, SEARCH_TABLE
+from app.services.phone import looks_like_phone_number, to_e164_prefix
+
+_TOKENS = re.compile(r"\w+", re.UNICODE)
+
+
+def has_search_terms(query: str) -> bool:
+    """False for queries such as "--" that contain no word characters to match on"""
+    return _TOKENS.search(query) is not None
+
+
+def fts_match_expression(query: str) -> str:
+    """
+    FTS5 MATCH expression: every term must match as a prefix. Phone-like
+    queries are normalised first so "0712 345" finds "+254712345...".
+    """
+    if looks_like_phone_number(query):
+        query = to_e164_prefix(query)
+    return " ".join(f'"{token}"*' for token in _TOKENS.findall(query))
+
+
+def _like_pattern(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def customer_search_query(dialect_name: str, query: str, columns: List[Any], limit: int):
+    """Ranked customer search, using the dialect's search index"""
+    if dialect_name == "sqlite":
+        fts = table(SEARCH_TABLE, column("rowid"), column("rank"))
+        return (
+            select(*columns)
+            .join(fts, fts.c.rowid == literal_column("customers.rowid"))
+            .where(literal_column(SEARCH_TABLE).op("MATCH")(fts_match_expression(query)))
+            .order_by(fts.c.rank)
+            .limit(limit)
+        )
+
+    # Postgres (trigram GIN indexes) and anything else: substring matches
+    term = query.strip().lower()
+    conditions = [
+        func.lower(Customer.name).like(_like_pattern(term), escape="\\"),
+        func.lower(Customer.email).like(_like_pattern(term), escape="\\"),
+        func.lower(Customer.code).like(_like_pattern(term), escape="\\"),
+    ]
+    if looks_like_phone_number(term):
+        digits = re.sub(r"\D", "", term)
+        # National part as typed ("0712..." -> "712...") and the full E.164 form
+        conditions.append(Customer.phone_number.like(_like_pattern(digits.lstrip("0"))))
+        conditions.append(Customer.phone_number.like(_like_pattern(to_e164_prefix(term))))
+    statement = select(*columns).where(or_(*conditions))
+    if dialect_name == "postgresql":
+        statement = statement.order_by(func.similarity(func.lower(Customer.name), term).desc())
+    return statement.order_by(Customer.name, Customer.id).limit(limit)
@@ -0,0 +1,59 @@
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+import orjson
+from typing import Any, Dict, List, Optional, Sequence, Type
+from pydantic import BaseModel
+
+# Always selected, even when projected away: keyset cursors and ETags need them
+_VERSION_FIELDS = ("id", "created_at", "updated_at")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson. Naive datetimes render as ISO 8601
+    without an offset, exactly as the Pydantic schemas would render them.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Validate a ``fields=id,amount`` projection against ``schema``. Returns the
+    names in schema order, or None for every field.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - schema.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return [name for name in schema.model_fields if name in requested]
+
+
+def projected_columns(schema: Type[BaseModel], model,
+                      names: Optional[List[str]] = None) -> List[Any]:
+    """
+    Columns for ``names`` (default: every schema field), followed by any of
+    id/created_at/updated_at that were left out, so rows still page and hash.
+    """
+    names = list(names or schema.model_fields)
+    extra = [name for name in _VERSION_FIELDS if name not in names]
+    return [getattr(model, name) for name in names + extra]
+
+
+def rows_to_dicts(rows: Sequence[Any], names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Column-only result rows as plain dicts. The rows come straight from typed
+    columns, so they need no per-item validation on the way out. With
+    ``names`` (the leading columns, see ``projected_columns``) trailing
+    bookkeeping columns are dropped.
+    """
+    if not rows:
+        return []
+    keys = names or rows[0]._fields  # Shared by every row; avoids a mapping per row
+    return [dict(zip(keys, row)) for row in rows]
@@ -1,106 +1,152 @@
 import africastalking
 from app.config import settings
+from app.services.metrics import SMS_REQUEST_SECONDS
+from app.services.phone import to_e164
+import asyncio
+import httpx
 import logging
-import requests
-from urllib.parse import urlencode
+import time
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
 
 class SMSService:
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         # Initialize Africa's Talking
         africastalking.initialize(settings.AT_USERNAME, settings.AT_API_KEY)
         self.sms = africastalking.SMS
         self.api_key = settings.AT_API_KEY
         self.username = settings.AT_USERNAME
         self.sender_id = settings.AT_SENDER_ID or ""
+        self.url = settings.AT_SMS_URL
 
-    async def send_order_notification(self, phone_number: str, customer_name: str,
-                                      item: str, amount: float):
-        try:
-            # Format phone number (ensure it starts with +254 for Kenya)
-            if not phone_number.startswith('+'):
-                if phone_number.startswith('0'):
-                    phone_number = '+254' + phone_number[1:]
-                else:
-                    phone_number = '+254' + phone_number
-
-            message = (f"Hello {customer_name}, your order for {item} worth KSH "
-                       f"{amount:,.2f} has been confirmed. Thank you for your business!")
+        # Pooled client, created lazily on the running event loop
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
-            # Try real API call first
-            try:
-                url = "https://api.sandbox.africastalking.com/version1/messaging"
-                headers = {
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the long-lived keep-alive client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                headers={
                     'Accept': 'application/json',
                     'Content-Type': 'application/x-www-form-urlencoded',
                     'apiKey': self.api_key
-                }
-                
-                # Use form data instead of JSON for SMS API
-                # For sandbox, username must be in form data, not headers
-                data = {
-                    "username": self.username,
-                    "message": message,
-                    "to": phone_number,  # Single phone number as string
-                    "from": self.sender_id or "AFRICASTKNG",  # Sender ID
-                    "bulkSMSMode": 1,  # Default value for bulk SMS
-                    "enqueue": 1  # Enable queuing for better performance
-                }
+                },
+                timeout=httpx.Timeout(settings.SMS_READ_TIMEOUT,
+                                      connect=settings.SMS_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.SMS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SMS_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.SMS_KEEPALIVE_EXPIRY
+                )
+            )
+            self._semaphore = asyncio.Semaphore(settings.SMS_MAX_CONCURRENCY)
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled client (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+
+    @staticmethod
+    def format_phone_number(phone_number: str) -> str:
+        # Format phone number (ensure it starts with +254 for Kenya)
+        return to_e164(phone_number)
 
-                # URL encode the data properly
-                encoded_data = urlencode(data)
-                response = requests.post(url, headers=headers, data=encoded_data)
-
-                if response.status_code in [200, 201]:  # 201 is also success for SMS
-                    response_data = response.json()
-                    logger.info("📱 SMS sent successfully to %s: %s", phone_number, response_data)
-                    print("\n📱 SMS NOTIFICATION SENT (REAL):")
-                    print(f"   To: {phone_number}")
-                    print(f"   Message: {message}")
-                    print("   Status: Success (Real API)")
-                    print(f"   Response: {response_data}")
-                    print()
-                    return response_data
-                else:
-                    logger.error(f"SMS API error: {response.status_code} - {response.text}")
-                    raise Exception(f"API Error: {response.status_code} - {response.text}")
+    @staticmethod
+    def format_order_message(customer_name: str, item: str, amount: float) -> str:
+        return (f"Hello {customer_name}, your order for {item} worth KSH "
+                f"{amount:,.2f} has been confirmed. Thank you for your business!")
+
+    async def _post_message(self, to: str, message: str) -> Dict[str, Any]:
+        """POST one message to the AT messaging API over the pooled client"""
+        client = self._get_client()
+        # Use form data instead of JSON for SMS API
+        # For sandbox, username must be in form data, not headers
+        data = {
+            "username": self.username,
+            "message": message,
+            "to": to,
+            "from": self.sender_id or "AFRICASTKNG",  # Sender ID
+            "bulkSMSMode": 1,  # Default value for bulk SMS
+            "enqueue": 1  # Enable queuing for better performance
+        }
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(self.url, data=data)
+            except Exception:
+                SMS_REQUEST_SECONDS.labels("error").observe(time.perf_counter() - started)
+                raise
+        success = response.status_code in [200, 201]  # 201 is also success for SMS
+        SMS_REQUEST_SECONDS.labels("success" if success else "rejected").observe(
+            time.perf_counter() - started)
+
+        if success:
+            return response.json()
+
+        logger.error(f"SMS API error: {response.status_code} - {response.text}")
+        raise Exception(f"API Error: {response.status_code} - {response.text}")
+
+    async def send_message(self, phone_numbers: List[str], message: str,
+                           simulate_on_error: bool = True) -> Dict[str, Any]:
+        """
+        Send one message body to one or more recipients in a single AT request.
+
+        Callers that retry on their own (the outbox worker) pass
+        ``simulate_on_error=False`` to get an ``{"error": ...}`` result instead
+        of a simulated success when the API call fails.
+        """
+        phone_numbers = [self.format_phone_number(number) for number in phone_numbers]
+        try:
+            # Try real API call first
+            try:
+                response_data = await self._post_message(",".join(phone_numbers), message)
+                logger.info("📱 SMS sent successfully to %s: %s", phone_numbers, response_data)
+                return response_data
 
             except Exception as api_error:
+                if not simulate_on_error:
+                    raise
                 logger.warning("Real SMS failed, falling back to simulation: %s", str(api_error))
 
                 # Fallback to simulation
                 logger.info("📱 SMS NOTIFICATION (SIMULATED):")
-                logger.info("   To: %s", phone_number)
+                logger.info("   To: %s", ", ".join(phone_numbers))
                 logger.info("   Message: %s", message)
                 logger.info("   Sender ID: %s", self.sender_id)
 
+                count = len(phone_numbers)
                 response_data = {
                     "SMSMessageData": {
-                        "Message": "Sent to 1/1 Total Cost: KES 0.8000",
+                        "Message": f"Sent to {count}/{count} Total Cost: KES {0.8 * count:.4f}",
                         "Recipients": [{
                             "statusCode": 101,
                             "number": phone_number,
                             "status": "Success",
                             "cost": "KES 0.8000",
                             "messageId": f"ATPid_{phone_number[-8:]}"
-                        }]
+                        } for phone_number in phone_numbers]
                     }
                 }
 
-                print("\n📱 SMS NOTIFICATION SENT (SIMULATED):")
-                print(f"   To: {phone_number}")
-                print(f"   Message: {message}")
-                print("   Status: Success (Simulated - Real API failed)")
-                print(f"   Error: {str(api_error)}")
-                print()
-
                 return response_data
         except Exception as e:
-            logger.error("Failed to send SMS to %s: %s", phone_number, str(e))
+            logger.error("Failed to send SMS to %s: %s", phone_numbers, str(e))
             # Don't raise exception to avoid breaking the order creation
             return {"error": str(e)}
 
+    async def send_order_notification(self, phone_number: str, customer_name: str,
+                                      item: str, amount: float):
+        message = self.format_order_message(customer_name, item, amount)
+        return await self.send_message([phone_number], message)
+
 
 sms_service = SMSService()
@@ -0,0 +1,201 @@
+"""
+Notification outbox worker.
+
+Drains ``notification_outbox`` rows written alongside orders and delivers them
+through Africa's Talking, grouping identical messages into bulk requests.
+Failed deliveries are retried with exponential backoff until
+``OUTBOX_MAX_ATTEMPTS`` is reached.
+
+    python -m app.workers.outbox            # run until interrupted
+    python -m app.workers.outbox --once     # drain what is due and exit
+"""
+import argparse
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.notification import NotificationOutbox
+from app.services.metrics import (
+    OUTBOX_BATCH_GROUPS, OUTBOX_BATCH_SIZE, OUTBOX_FAILED_RECIPIENTS, OUTBOX_SMS_REQUESTS
+)
+from app.services.sms import SMSService, sms_service
+
+logger = logging.getLogger(__name__)
+
+SUCCESS_STATUSES = {"Success", "Sent", "Queued"}
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at OUTBOX_BACKOFF_MAX_SECONDS"""
+    delay = min(settings.OUTBOX_BACKOFF_MAX_SECONDS,
+                settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return random.uniform(delay / 2, delay)
+
+
+class OutboxWorker:
+    def __init__(self, session_factory: async_sessionmaker = AsyncSessionLocal,
+                 service: SMSService = sms_service, batch_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.service = service
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def _claim(self, db: AsyncSession, now: datetime) -> List[NotificationOutbox]:
+        """
+        Lease a batch of due rows so concurrent workers do not send them twice.
+
+        The due check, the lease and the read-back happen in one
+        ``UPDATE ... RETURNING`` statement, so a worker only gets the rows its
+        own statement changed. Rows another worker leased in the meantime are
+        no longer due when the UPDATE re-checks them and drop out.
+        """
+        due = or_(
+            and_(NotificationOutbox.status == "pending",
+                 NotificationOutbox.next_attempt_at <= now),
+            and_(NotificationOutbox.status == "sending",
+                 NotificationOutbox.locked_until < now)
+        )
+        candidates = (
+            select(NotificationOutbox.id)
+            .where(due)
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        rows = (await db.scalars(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(candidates), due)
+            .values(status="sending",
+                    locked_until=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS))
+            .returning(NotificationOutbox),
+            execution_options={"synchronize_session": False}
+        )).all()
+        await db.commit()
+        return list(rows)
+
+    async def _deliver(self, rows: List[NotificationOutbox]) -> Dict[str, Optional[str]]:
+        """Send rows grouped by message body; returns row id -> error (None on success)"""
+        groups: Dict[str, List[NotificationOutbox]] = defaultdict(list)
+        for row in rows:
+            groups[row.message].append(row)
+
+        messages = list(groups)
+        responses = await asyncio.gather(*[
+            self.service.send_message([row.phone_number for row in groups[message]], message,
+                                      simulate_on_error=False)
+            for message in messages
+        ])
+
+        results: Dict[str, Optional[str]] = {}
+        for message, response in zip(messages, responses):
+            group = groups[message]
+            if "error" in response:
+                for row in group:
+                    results[row.id] = response["error"]
+                continue
+
+            by_number = defaultdict(list)
+            for recipient in response.get("SMSMessageData", {}).get("Recipients", []):
+                by_number[recipient.get("number")].append(recipient)
+            for row in group:
+                number = self.service.format_phone_number(row.phone_number)
+                recipient = by_number[number].pop(0) if by_number[number] else None
+                if recipient is None:
+                    results[row.id] = "Recipient missing from provider response"
+                elif recipient.get("status") in SUCCESS_STATUSES:
+                    row.provider_message_id = recipient.get("messageId")
+                    results[row.id] = None
+                else:
+                    results[row.id] = f"{recipient.get('statusCode')} {recipient.get('status')}"
+        return results
+
+    async def drain_once(self) -> int:
+        """Deliver one batch of due notifications; returns the number of rows handled"""
+        async with self.session_factory() as db:
+            now = datetime.utcnow()
+            rows = await self._claim(db, now)
+            if not rows:
+                return 0
+
+            results = await self._deliver(rows)
+            groups = len({row.message for row in rows})  # One AT request per distinct body
+            failed = sum(1 for error in results.values() if error is not None)
+            OUTBOX_BATCH_SIZE.observe(len(rows))
+            OUTBOX_BATCH_GROUPS.observe(groups)
+            OUTBOX_SMS_REQUESTS.inc(groups)
+            OUTBOX_FAILED_RECIPIENTS.inc(failed)
+
+            now = datetime.utcnow()
+            for row in rows:
+                error = results.get(row.id)
+                row.attempts += 1
+                row.locked_until = None
+                if error is None:
+                    row.status = "sent"
+                    row.sent_at = now
+                    row.last_error = None
+                elif row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    row.status = "failed"
+                    row.last_error = error[:500]
+                    logger.error("Notification %s gave up after %d attempts: %s",
+                                 row.idempotency_key, row.attempts, error)
+                else:
+                    row.status = "pending"
+                    row.last_error = error[:500]
+                    row.next_attempt_at = now + timedelta(seconds=backoff_delay(row.attempts))
+            await db.commit()
+
+            logger.info("Outbox batch: %d sent in %d requests, %d to retry or failed",
+                        len(rows) - failed, groups, failed)
+            return len(rows)
+
+    async def run_forever(self, poll_interval: Optional[float] = None):
+        poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL_SECONDS
+        while not self._stopping.is_set():
+            try:
+                handled = await self.drain_once()
+            except Exception as e:
+                logger.error("Outbox drain failed: %s", str(e))
+                handled = 0
+            # A full batch means more work is probably due; go again immediately
+            if handled < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+async def _main(once: bool):
+    worker = OutboxWorker()
+    try:
+        if once:
+            while await worker.drain_once() == worker.batch_size:
+                pass
+        else:
+            await worker.run_forever()
+    finally:
+        await worker.service.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued order notifications")
+    parser.add_argument("--once", action="store_true", help="Drain due rows and exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Shared setup: the API wired to a scratch SQLite database, driven in-process"""
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import (
+    Base, apply_sqlite_pragmas, engine_options, get_db, get_read_db, get_session_factory,
+    to_async_url
+)
+from app.config import settings
+from app.main import app
+from app.services.auth import auth_service
+from app.services.sms import sms_service
+from app.workers.outbox import OutboxWorker
+from tests.fakes import FakeATEndpoint
+
+
+@asynccontextmanager
+async def bench_client(db_path: Optional[Path],
+                       url: Optional[str] = None,
+                       sms: Optional[FakeATEndpoint] = None
+                       ) -> AsyncIterator[Tuple[httpx.AsyncClient, Dict[str, str]]]:
+    """
+    Pass ``url`` to bench against another database (its tables are dropped
+    afterwards). With ``sms``, an outbox worker delivers order notifications
+    to that fake Africa's Talking endpoint while the client is in use.
+    """
+    url = url or f"sqlite:///{db_path}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+
+    # Same engine profile (pool, pragmas) as app.database, from the current settings
+    engine = create_async_engine(to_async_url(url), **engine_options(url))
+    apply_sqlite_pragmas(engine.sync_engine)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, autoflush=False,
+                                  expire_on_commit=False)
+
+    async def override_get_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: sessions
+    token = auth_service.create_access_token({"sub": "bench", "scopes": ["read", "write"]})
+    headers = {"Authorization": f"Bearer {token}"}
+    worker_task = None
+    original_transport = sms_service._transport
+    # One subject drives the whole load; per-client limits would only measure themselves
+    rate_limit_enabled = settings.RATE_LIMIT_ENABLED
+    settings.RATE_LIMIT_ENABLED = False
+    try:
+        if sms is not None:
+            sms_service._transport = httpx.ASGITransport(app=sms)
+            sms_service._client = None
+            worker = OutboxWorker(session_factory=sessions)
+            worker_task = asyncio.create_task(worker.run_forever())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client, headers
+    finally:
+        if worker_task is not None:
+            worker.stop()
+            await worker_task
+            await sms_service.aclose()
+            sms_service._transport = original_transport
+        app.dependency_overrides.clear()
+        settings.RATE_LIMIT_ENABLED = rate_limit_enabled
+        await engine.dispose()
+        if db_path is None:
+            Base.metadata.drop_all(bind=sync_engine)
+        sync_engine.dispose()
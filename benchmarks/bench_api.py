@@ -0,0 +1,297 @@
+"""
+Reproducible API load benchmark: seeded data, a weighted request mix, per-endpoint percentiles.
+
+    python -m benchmarks.bench_api --customers 1000 --orders 20000 --requests 5000
+    python -m benchmarks.bench_api --mix get_order=80,create_order=20 --concurrency 64
+    python -m benchmarks.bench_api --compare benchmarks/results/<baseline>.json
+
+Customers and orders are seeded through the API (bulk import, batch orders),
+then ``--requests`` requests drawn from ``--mix`` are driven through the ASGI
+app with a bearer token. Order SMS go through the outbox to an in-process fake
+Africa's Talking endpoint. The request plan is fixed by ``--seed``, so runs on
+different commits replay the same requests.
+
+Results (per-endpoint count, errors, req/s and p50/p95/p99 latency, plus the
+commit and parameters) are written as JSON to ``--output``, by default
+``benchmarks/results/<commit>.json``. ``--compare`` prints the change against an
+earlier result and exits non-zero when a p95 regressed by more than
+``--threshold`` percent.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks._app import bench_client
+from tests.fakes import FakeATEndpoint
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_MIX = ("list_orders=25,get_order=25,create_order=15,update_order=10,"
+               "get_customer=10,list_customers=10,search_customers=5")
+
+
+@dataclass
+class Dataset:
+    """Seeded ids the request plan draws from (only seeded ones, so plans are reproducible)"""
+    customer_ids: List[str]
+    order_ids: List[str]
+
+
+Request = Tuple[str, str, Dict[str, Any]]  # method, path, httpx keyword arguments
+Scenario = Callable[[random.Random, Dataset], Request]
+
+
+def _order_body(rng: random.Random, customer_id: str) -> Dict[str, Any]:
+    return {
+        "customer_id": customer_id,
+        "item": f"Item {rng.randrange(1000)}",
+        "amount": round(rng.uniform(100, 100000), 2),
+        "time": (datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(525600))).isoformat(),
+        "description": "Benchmark order",
+    }
+
+
+SCENARIOS: Dict[str, Tuple[str, Scenario]] = {
+    "list_orders": ("GET /orders", lambda rng, data: (
+        "GET", "/api/v1/orders/",
+        {"params": {"customer_id": rng.choice(data.customer_ids), "limit": 20}})),
+    "get_order": ("GET /orders/{id}", lambda rng, data: (
+        "GET", f"/api/v1/orders/{rng.choice(data.order_ids)}", {})),
+    "create_order": ("POST /orders", lambda rng, data: (
+        "POST", "/api/v1/orders/", {"json": _order_body(rng, rng.choice(data.customer_ids))})),
+    "update_order": ("PUT /orders/{id}", lambda rng, data: (
+        "PUT", f"/api/v1/orders/{rng.choice(data.order_ids)}",
+        {"json": {"amount": round(rng.uniform(100, 100000), 2)}})),
+    "get_customer": ("GET /customers/{id}", lambda rng, data: (
+        "GET", f"/api/v1/customers/{rng.choice(data.customer_ids)}", {})),
+    "list_customers": ("GET /customers", lambda rng, data: (
+        "GET", "/api/v1/customers/", {"params": {"skip": rng.randrange(100), "limit": 50}})),
+    "search_customers": ("GET /customers/search", lambda rng, data: (
+        "GET", "/api/v1/customers/search", {"params": {"q": f"Customer {rng.randrange(100)}"}})),
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Linear-interpolated percentile of pre-sorted samples (q in 0-100)"""
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+async def seed(client: httpx.AsyncClient, headers: Dict[str, str], customers: int,
+               orders: int, rng: random.Random) -> Dataset:
+    lines = "\n".join(json.dumps({
+        "name": f"Customer {i} {rng.choice(['Wanjiku', 'Otieno', 'Achieng', 'Kamau'])}",
+        "code": f"B{i:07d}",
+        "phone_number": f"07{rng.randrange(10 ** 8):08d}",
+    }) for i in range(customers))
+    response = await client.post("/api/v1/customers/import", content=lines.encode(),
+                                 headers={**headers, "Content-Type": "application/x-ndjson"})
+    response.raise_for_status()
+
+    customer_ids: List[str] = []
+    cursor = ""
+    while cursor is not None:
+        response = await client.get("/api/v1/customers/", params={
+            "cursor": cursor, "limit": 1000, "fields": "id"}, headers=headers)
+        page = response.json()
+        customer_ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+
+    order_ids: List[str] = []
+    for start in range(0, orders, 1000):
+        batch = [_order_body(rng, rng.choice(customer_ids))
+                 for _ in range(min(1000, orders - start))]
+        response = await client.post("/api/v1/orders/batch", json=batch, headers=headers)
+        response.raise_for_status()
+        order_ids.extend(order["id"] for order in response.json())
+    return Dataset(customer_ids, order_ids)
+
+
+async def drive(client: httpx.AsyncClient, headers: Dict[str, str],
+                plan: List[Tuple[str, Request]], concurrency: int
+                ) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    queue = iter(plan)
+
+    async def worker():
+        for scenario, (method, path, kwargs) in queue:
+            began = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, **kwargs)
+                failed = response.status_code >= 400
+            except Exception:  # e.g. "database is locked" surfacing from the app
+                failed = True
+            latencies.setdefault(scenario, []).append(time.perf_counter() - began)
+            errors[scenario] = errors.get(scenario, 0) + failed
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+
+    endpoints = {SCENARIOS[name][0]: summarize(samples, errors[name], elapsed)
+                 for name, samples in sorted(latencies.items())}
+    total = summarize([s for samples in latencies.values() for s in samples],
+                      sum(errors.values()), elapsed)
+    return endpoints, total
+
+
+def make_plan(rng: random.Random, data: Dataset, weights: Dict[str, float],
+              count: int) -> List[Tuple[str, Request]]:
+    """Draw the whole request sequence up front so every run replays the same requests"""
+    names = rng.choices(list(weights), weights=list(weights.values()), k=count)
+    return [(name, SCENARIOS[name][1](rng, data)) for name in names]
+
+
+def git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True,
+                              cwd=Path(__file__).parent).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None,
+                "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+async def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    weights = parse_mix(args.mix)
+    sms = FakeATEndpoint(latency=args.sms_latency)
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = None if args.database_url else Path(scratch) / "bench.db"
+        async with bench_client(db_path, args.database_url, sms=sms) as (client, headers):
+            data = await seed(client, headers, args.customers, args.orders, rng)
+            warmup = make_plan(rng, data, weights, args.warmup)
+            await drive(client, headers, warmup, args.concurrency)
+            plan = make_plan(rng, data, weights, args.requests)
+            endpoints, total = await drive(client, headers, plan, args.concurrency)
+
+    return {
+        **git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": "postgres" if args.database_url else "sqlite",
+        "parameters": {
+            "customers": args.customers, "orders": args.orders, "requests": args.requests,
+            "warmup": args.warmup, "concurrency": args.concurrency, "seed": args.seed,
+            "mix": weights, "sms_latency": args.sms_latency,
+        },
+        "sms_requests": sms.request_count,
+        "total": total,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    print(f"{'endpoint':<24}{'count':>7}{'err':>5}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}" + ("   p95 vs baseline" if baseline else ""))
+    rows = list(result["endpoints"].items()) + [("total", result["total"])]
+    for name, stats in rows:
+        line = (f"{name:<24}{stats['count']:>7}{stats['errors']:>5}{stats['rps']:>9.1f}"
+                f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}")
+        before = _baseline_stats(baseline, name)
+        if before and before["p95_ms"]:
+            line += f"   {(stats['p95_ms'] / before['p95_ms'] - 1) * 100:>+7.1f}%"
+        print(line)
+
+
+def _baseline_stats(baseline: Optional[Dict[str, Any]], name: str) -> Optional[Dict[str, float]]:
+    if baseline is None:
+        return None
+    return baseline["total"] if name == "total" else baseline["endpoints"].get(name)
+
+
+def regressions(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Endpoints whose p95 grew by more than ``threshold`` percent"""
+    found = []
+    for name, stats in list(result["endpoints"].items()) + [("total", result["total"])]:
+        before = _baseline_stats(baseline, name)
+        if before and before["p95_ms"] and \
+                stats["p95_ms"] > before["p95_ms"] * (1 + threshold / 100):
+            found.append(name)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200, help="Requests run before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"scenario=weight pairs; scenarios: {', '.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sms-latency", type=float, default=0.05,
+                        help="Seconds the fake Africa's Talking endpoint takes per request")
+    parser.add_argument("--database-url", help="Bench against this database instead of SQLite")
+    parser.add_argument("--output", type=Path,
+                        help="Result JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="p95 regression (percent) that makes --compare fail")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(result, baseline)
+
+    output = args.output
+    if output is None:
+        name = (result["commit"] or "unversioned")[:12] + ("-dirty" if result["dirty"] else "")
+        output = RESULTS_DIR / f"{name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"\nResults written to {output}")
+
+    if baseline is not None:
+        regressed = regressions(result, baseline, args.threshold)
+        if regressed:
+            print(f"p95 regressed by more than {args.threshold:g}%: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of POST /orders/batch versus the same orders sent one at a time.
+
+    python -m benchmarks.bench_batch_orders --orders 1000 --customers 50
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks._app import bench_client
+
+
+async def run(orders: int, customers: int, batch_size: int):
+    results = {}
+    for mode in ("single", "batch"):
+        with tempfile.TemporaryDirectory() as scratch:
+            async with bench_client(Path(scratch) / "bench.db") as (client, headers):
+                customer_ids = []
+                for i in range(customers):
+                    response = await client.post("/api/v1/customers/", json={
+                        "name": f"Customer {i}", "code": f"B{i:05d}",
+                        "phone_number": "+254700000000"
+                    }, headers=headers)
+                    customer_ids.append(response.json()["id"])
+
+                payload = [{
+                    "customer_id": customer_ids[i % customers], "item": "Item",
+                    "amount": 100.0, "time": datetime.now().isoformat(),
+                    "description": "Benchmark order"
+                } for i in range(orders)]
+
+                began = time.perf_counter()
+                if mode == "single":
+                    for order in payload:
+                        response = await client.post("/api/v1/orders/", json=order,
+                                                     headers=headers)
+                        assert response.status_code == 201
+                else:
+                    for start in range(0, orders, batch_size):
+                        response = await client.post("/api/v1/orders/batch",
+                                                     json=payload[start:start + batch_size],
+                                                     headers=headers)
+                        assert response.status_code == 201
+                results[mode] = time.perf_counter() - began
+
+    for mode, elapsed in results.items():
+        print(f"{mode:<8} {elapsed:8.3f}s  {orders / elapsed:10.1f} orders/s")
+    print(f"speedup: {results['single'] / results['batch']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.customers, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
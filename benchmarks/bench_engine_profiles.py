@@ -0,0 +1,124 @@
+"""
+Load test of the database engine profiles under a concurrent read/write mix.
+
+    python -m benchmarks.bench_engine_profiles --requests 2000 --concurrency 32
+    python -m benchmarks.bench_engine_profiles --postgres-url postgresql://user:pw@host/db
+
+Profiles are applied by overriding the DB_* / SQLITE_* settings before the
+engine is built, so they measure exactly what app.database would configure.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from benchmarks._app import bench_client
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # The previous setup: no pragmas (rollback journal, fsync on every commit) and
+    # SQLAlchemy's default 5 + 10 pool
+    "sqlite-default": {
+        "SQLITE_JOURNAL_MODE": None, "SQLITE_SYNCHRONOUS": None,
+        "SQLITE_MMAP_SIZE": None, "SQLITE_BUSY_TIMEOUT_MS": None,
+        "SQLITE_POOL_SIZE": 5, "SQLITE_MAX_OVERFLOW": 10,
+    },
+    # The shipped defaults
+    "sqlite-tuned": {},
+    "postgres": {},
+}
+
+
+async def run_profile(name: str, requests: int, concurrency: int, write_ratio: float,
+                      postgres_url: Optional[str]) -> Dict[str, float]:
+    original = {key: getattr(settings, key) for key in PROFILES[name]}
+    for key, value in PROFILES[name].items():
+        setattr(settings, key, value)
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            db_path = None if name == "postgres" else Path(scratch) / "bench.db"
+            async with bench_client(db_path, postgres_url if db_path is None else None) as (
+                    client, headers):
+                return await _load(client, headers, requests, concurrency, write_ratio)
+    finally:
+        for key, value in original.items():
+            setattr(settings, key, value)
+
+
+async def _load(client, headers, requests: int, concurrency: int,
+                write_ratio: float) -> Dict[str, float]:
+    customer_ids = []
+    for i in range(50):
+        response = await client.post("/api/v1/customers/", json={
+            "name": f"Customer {i}", "code": f"P{i:05d}", "phone_number": "+254700000000"
+        }, headers=headers)
+        customer_ids.append(response.json()["id"])
+
+    rng = random.Random(42)
+    plan = [rng.random() < write_ratio for _ in range(requests)]
+    latencies = []
+    errors = 0
+    queue = iter(plan)
+
+    async def worker():
+        nonlocal errors
+        for is_write in queue:
+            customer_id = rng.choice(customer_ids)
+            began = time.perf_counter()
+            try:
+                if is_write:
+                    response = await client.post("/api/v1/orders/", json={
+                        "customer_id": customer_id, "item": "Item", "amount": 100.0,
+                        "time": datetime.now().isoformat(), "description": "Load test order"
+                    }, headers=headers)
+                else:
+                    response = await client.get("/api/v1/orders/", params={
+                        "customer_id": customer_id, "limit": 20
+                    }, headers=headers)
+                failed = response.status_code >= 400
+            except Exception:  # e.g. "database is locked" surfacing from the app
+                failed = True
+            latencies.append(time.perf_counter() - began)
+            errors += failed
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - began
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "errors": errors,
+    }
+
+
+async def run(requests: int, concurrency: int, write_ratio: float,
+              postgres_url: Optional[str]):
+    names = [name for name in PROFILES if name != "postgres" or postgres_url]
+    print(f"{'profile':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name in names:
+        result = await run_profile(name, requests, concurrency, write_ratio, postgres_url)
+        print(f"{name:<16}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--postgres-url", help="Also run the postgres profile against this URL")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.write_ratio, args.postgres_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+GET /orders list latency: the orjson column-only path versus ORM + Pydantic validation.
+
+    python -m benchmarks.bench_list_serialization --orders 5000 --sizes 100 500 1000 5000
+
+The "validated" path is the previous handler (ORM objects through
+response_model=List[Order] and the stdlib encoder), mounted on a bench-only route.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_db
+from app.main import app
+from app.models.order import Order
+from app.schemas.order import Order as OrderSchema
+from benchmarks._app import bench_client
+
+
+@app.get("/bench/orders-validated", response_model=List[OrderSchema], include_in_schema=False)
+async def validated_orders(limit: int = 100, db: AsyncSession = Depends(get_read_db)):
+    result = await db.scalars(select(Order).limit(limit))
+    return result.all()
+
+
+async def run(orders: int, sizes: List[int], repeat: int):
+    with tempfile.TemporaryDirectory() as scratch:
+        async with bench_client(Path(scratch) / "bench.db") as (client, headers):
+            response = await client.post("/api/v1/customers/", json={
+                "name": "Customer", "code": "S00001", "phone_number": "+254700000000"
+            }, headers=headers)
+            customer_id = response.json()["id"]
+            for start in range(0, orders, 1000):
+                await client.post("/api/v1/orders/batch", json=[{
+                    "customer_id": customer_id, "item": f"Item {i}", "amount": 100.0 + i,
+                    "time": datetime.now().isoformat(), "description": "Benchmark order"
+                } for i in range(start, min(start + 1000, orders))], headers=headers)
+
+            print(f"{'page size':>10}{'validated ms':>15}{'orjson ms':>12}{'speedup':>10}")
+            for size in sizes:
+                timings = {}
+                for name, path in (("validated", "/bench/orders-validated"),
+                                   ("orjson", "/api/v1/orders/")):
+                    samples = []
+                    for _ in range(repeat):
+                        began = time.perf_counter()
+                        response = await client.get(path, params={"limit": size},
+                                                    headers=headers)
+                        samples.append(time.perf_counter() - began)
+                        assert response.status_code == 200
+                    timings[name] = statistics.median(samples) * 1000
+                print(f"{size:>10}{timings['validated']:>15.2f}{timings['orjson']:>12.2f}"
+                      f"{timings['validated'] / timings['orjson']:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
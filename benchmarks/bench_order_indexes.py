@@ -0,0 +1,112 @@
+"""
+Per-customer order listing latency before and after the order index migrations.
+
+Builds a scratch SQLite database at revision 0001 (no secondary indexes), seeds
+it, times the queries behind ``GET /orders?customer_id=`` and a per-customer
+time-range report, then upgrades to head and times them again.
+
+    python -m benchmarks.bench_order_indexes --orders 1000000 --customers 10000
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+QUERIES = {
+    "list by customer": (
+        "SELECT * FROM orders WHERE customer_id = ? LIMIT 100"
+    ),
+    "list by customer (keyset)": (
+        "SELECT * FROM orders WHERE customer_id = ? ORDER BY created_at, id LIMIT 101"
+    ),
+    "customer time range": (
+        "SELECT count(*), sum(amount) FROM orders WHERE customer_id = ? "
+        "AND time >= ? AND time < ?"
+    ),
+}
+
+
+def seed(path: Path, orders: int, customers: int) -> list:
+    conn = sqlite3.connect(path)
+    customer_ids = [str(uuid.uuid4()) for _ in range(customers)]
+    conn.executemany(
+        "INSERT INTO customers (id, name, code, phone_number, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(cid, f"Customer {i}", f"C{i:07d}", "+254700000000", datetime(2024, 1, 1))
+         for i, cid in enumerate(customer_ids)]
+    )
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(orders):
+        moment = start + timedelta(seconds=i * 30)
+        batch.append((str(uuid.uuid4()), random.choice(customer_ids), "Item", 100.0 + i % 500,
+                      moment, "Benchmark order", moment))
+        if len(batch) == 50000:
+            conn.executemany("INSERT INTO orders (id, customer_id, item, amount, time, "
+                             "description, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO orders (id, customer_id, item, amount, time, "
+                         "description, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return customer_ids
+
+
+def measure(path: Path, customer_ids: list, samples: int) -> dict:
+    conn = sqlite3.connect(path)
+    probes = random.sample(customer_ids, min(samples, len(customer_ids)))
+    results = {}
+    for name, sql in QUERIES.items():
+        timings = []
+        for cid in probes:
+            params = (cid,) if sql.count("?") == 1 else (
+                cid, datetime(2024, 3, 1), datetime(2024, 4, 1))
+            began = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - began) * 1000)
+        timings.sort()
+        results[name] = (statistics.median(timings), timings[int(len(timings) * 0.95) - 1])
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = Path(scratch) / "bench.db"
+        config = Config("alembic.ini")
+        config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+
+        command.upgrade(config, "0001")
+        began = time.perf_counter()
+        customer_ids = seed(path, args.orders, args.customers)
+        print(f"seeded {args.orders:,} orders / {args.customers:,} customers "
+              f"in {time.perf_counter() - began:.1f}s")
+
+        before = measure(path, customer_ids, args.samples)
+        command.upgrade(config, "head")
+        sqlite3.connect(path).execute("ANALYZE").connection.close()
+        after = measure(path, customer_ids, args.samples)
+
+    print(f"{'query':<28}{'before p50/p95 ms':>22}{'after p50/p95 ms':>22}")
+    for name in QUERIES:
+        (b50, b95), (a50, a95) = before[name], after[name]
+        print(f"{name:<28}{b50:>11.2f} /{b95:>8.2f}{a50:>11.3f} /{a95:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Offline SMS throughput benchmark.
+
+Serves the fake Africa's Talking endpoint over a local socket and compares the
+old path (a blocking ``requests.post`` per notification, no session reuse)
+with the pooled ``httpx.AsyncClient`` in ``SMSService``.
+
+    python -m benchmarks.bench_sms --notifications 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+import requests
+import uvicorn
+
+from app.config import settings
+from app.services.sms import SMSService
+from tests.fakes import FakeATEndpoint
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(endpoint: FakeATEndpoint, port: int) -> uvicorn.Server:
+    config = uvicorn.Config(endpoint, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def bench_blocking(url: str, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        requests.post(url, data={"to": f"+2547{i:08d}", "message": "hello"})
+    return time.perf_counter() - start
+
+
+async def bench_pooled(url: str, count: int) -> float:
+    settings.AT_SMS_URL = url
+    service = SMSService()
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        service.send_order_notification(f"+2547{i:08d}", "Bench", "Item", 1.0)
+        for i in range(count)
+    ])
+    elapsed = time.perf_counter() - start
+    await service.aclose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Simulated AT round trip in seconds")
+    args = parser.parse_args()
+
+    endpoint = FakeATEndpoint(latency=args.latency)
+    port = _free_port()
+    server = _serve(endpoint, port)
+    url = f"http://127.0.0.1:{port}/version1/messaging"
+
+    blocking = bench_blocking(url, args.notifications)
+    pooled = asyncio.run(bench_pooled(url, args.notifications))
+    server.should_exit = True
+
+    for name, elapsed in (("blocking requests.post", blocking), ("pooled httpx", pooled)):
+        print(f"{name:<24} {elapsed:8.3f}s  {args.notifications / elapsed:10.1f} sms/s")
+    print(f"speedup: {blocking / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -142,6 +142,11 @@ resource "aws_ecs_task_definition" "app" {
         {
           name  = "DEBUG"
           value = "false"
+        },
+        {
+          # Single container: drain the SMS outbox inside the API
+          name  = "OUTBOX_WORKER_IN_PROCESS"
+          value = "true"
         }
       ]
       secrets = [
@@ -0,0 +1,69 @@
+"""Initial schema: customers, orders and the notification outbox
+
+Matches what Base.metadata.create_all produced before migrations existed, so
+databases created that way can be adopted with ``alembic stamp 0001``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "customers",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("code", sa.String(50), nullable=False),
+        sa.Column("phone_number", sa.String(20), nullable=False),
+        sa.Column("email", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_customers_code", "customers", ["code"], unique=True)
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("customer_id", sa.String(36), sa.ForeignKey("customers.id"), nullable=False),
+        sa.Column("item", sa.String(255), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("time", sa.DateTime(), nullable=False),
+        sa.Column("description", sa.String(500), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("idempotency_key", sa.String(100), nullable=False, unique=True),
+        sa.Column("phone_number", sa.String(20), nullable=False),
+        sa.Column("message", sa.String(1000), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(500), nullable=True),
+        sa.Column("provider_message_id", sa.String(100), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_notification_outbox_status_next_attempt", "notification_outbox",
+                    ["status", "next_attempt_at"])
+
+
+def downgrade():
+    op.drop_index("ix_notification_outbox_status_next_attempt", "notification_outbox")
+    op.drop_table("notification_outbox")
+    op.drop_table("orders")
+    op.drop_index("ix_customers_code", "customers")
+    op.drop_table("customers")
@@ -0,0 +1,26 @@
+"""created_at indexes for keyset pagination and recency scans
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_customers_created_at_id", "customers", ["created_at", "id"])
+    op.create_index("ix_orders_created_at_id", "orders", ["created_at", "id"])
+    op.create_index("ix_orders_customer_id_created_at_id", "orders",
+                    ["customer_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_orders_customer_id_created_at_id", "orders")
+    op.drop_index("ix_orders_created_at_id", "orders")
+    op.drop_index("ix_customers_created_at_id", "customers")
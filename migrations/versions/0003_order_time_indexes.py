@@ -0,0 +1,23 @@
+"""Order time indexes for per-customer listings and time-range reports
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_orders_customer_id_time", "orders", ["customer_id", "time"])
+    op.create_index("ix_orders_time", "orders", ["time"])
+
+
+def downgrade():
+    op.drop_index("ix_orders_time", "orders")
+    op.drop_index("ix_orders_customer_id_time", "orders")
@@ -0,0 +1,35 @@
+"""Per-customer daily order rollups, backfilled from existing orders
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "order_daily_rollups",
+        sa.Column("customer_id", sa.String(36), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_order_daily_rollups_day", "order_daily_rollups", ["day"])
+    op.execute(
+        "INSERT INTO order_daily_rollups (customer_id, day, order_count, total_amount) "
+        "SELECT customer_id, date(time), count(*), sum(amount) FROM orders "
+        "GROUP BY customer_id, date(time)"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_order_daily_rollups_day", "order_daily_rollups")
+    op.drop_table("order_daily_rollups")
@@ -0,0 +1,89 @@
+"""Customer search index (SQLite FTS5 / Postgres trigram) and E.164 phone numbers
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+FTS_VALUES = ("{row}.rowid, {row}.name, {row}.code, "
+              "{row}.phone_number || ' ' || substr({row}.phone_number, 5), "
+              "coalesce({row}.email, '')")
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5("
+    "name, code, phone, email, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN "
+    "INSERT INTO customers_fts (rowid, name, code, phone, email) "
+    f"VALUES ({FTS_VALUES.format(row='new')}); END",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN "
+    "DELETE FROM customers_fts WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_au AFTER UPDATE ON customers BEGIN "
+    "DELETE FROM customers_fts WHERE rowid = old.rowid; "
+    "INSERT INTO customers_fts (rowid, name, code, phone, email) "
+    f"VALUES ({FTS_VALUES.format(row='new')}); END",
+    "INSERT INTO customers_fts (rowid, name, code, phone, email) "
+    f"SELECT {FTS_VALUES.format(row='customers')} FROM customers",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_customers_name_trgm "
+    "ON customers USING gin (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_email_trgm "
+    "ON customers USING gin (lower(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_code_trgm "
+    "ON customers USING gin (lower(code) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_customers_phone_number_trgm "
+    "ON customers USING gin (phone_number gin_trgm_ops)",
+]
+
+
+def to_e164(phone_number):
+    # Frozen copy of app.services.phone.to_e164 as of this revision
+    cleaned = "".join(ch for ch in phone_number if ch not in " \t-().")
+    if cleaned.startswith("+"):
+        return cleaned
+    if cleaned.startswith("0"):
+        return "+254" + cleaned[1:]
+    if cleaned.startswith("254") and len(cleaned) == 12:
+        return "+" + cleaned
+    return "+254" + cleaned
+
+
+def upgrade():
+    bind = op.get_bind()
+    customers = sa.table("customers", sa.column("id"), sa.column("phone_number"))
+    for row in bind.execute(sa.select(customers.c.id, customers.c.phone_number)).all():
+        normalized = to_e164(row.phone_number)
+        if normalized != row.phone_number:
+            bind.execute(customers.update()
+                         .where(customers.c.id == row.id)
+                         .values(phone_number=normalized))
+
+    if bind.dialect.name == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif bind.dialect.name == "postgresql":
+        for statement in POSTGRES_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade():
+    # Phone numbers stay normalised; only the search index is removed
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("customers_fts_ai", "customers_fts_ad", "customers_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS customers_fts")
+    elif bind.dialect.name == "postgresql":
+        for index in ("ix_customers_name_trgm", "ix_customers_email_trgm",
+                      "ix_customers_code_trgm", "ix_customers_phone_number_trgm"):
+            op.execute(f"DROP INDEX IF EXISTS {index}")
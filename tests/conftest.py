@@ -1,12 +1,20 @@
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
-from app.database import get_db, Base
+from app.database import (
+    apply_sqlite_pragmas, get_db, get_read_db, get_read_session_factory, get_session_factory,
+    instrument_engine, Base, to_async_url
+)
 from app.config import settings
+from app.services.customer_cache import customer_cache
+from app.services.rate_limit import InMemoryRateLimitBackend, rate_limiter
+from app.services.sms import sms_service
+from tests.fakes import FakeATEndpoint
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -16,24 +24,53 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The app talks to the same file through aiosqlite; NullPool keeps connections
+# from outliving the TestClient event loop they were opened on
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+apply_sqlite_pragmas(async_engine.sync_engine)
+instrument_engine(async_engine.sync_engine)
+
+TestingSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @pytest.fixture
-def client():
+def fake_at():
+    # Route outbound SMS to the in-process AT double instead of the network
+    endpoint = FakeATEndpoint()
+    original_transport = sms_service._transport
+    sms_service._transport = httpx.ASGITransport(app=endpoint)
+    sms_service._client = None
+    yield endpoint
+    sms_service._transport = original_transport
+    sms_service._client = None
+
+@pytest.fixture
+def tables():
     Base.metadata.create_all(bind=engine)
+    customer_cache.clear()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def client(fake_at, tables, monkeypatch):
+    # Tests drive the outbox worker and idempotency key compaction explicitly
+    monkeypatch.setattr(settings, "OUTBOX_WORKER_IN_PROCESS", False)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_COMPACTION_INTERVAL_SECONDS", 0)
+    # Every test starts with full rate-limit buckets
+    monkeypatch.setattr(rate_limiter, "backend", InMemoryRateLimitBackend())
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+    app.dependency_overrides[get_read_session_factory] = lambda: TestingSessionLocal
     
     with TestClient(app) as test_client:
         yield test_client
     
-    Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
 
 @pytest.fixture
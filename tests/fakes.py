@@ -0,0 +1,84 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+
+class FakeATEndpoint:
+    """
+    Offline stand-in for the Africa's Talking messaging API.
+
+    It is a plain ASGI app, so tests can mount it with ``httpx.ASGITransport``
+    and benchmarks can serve it over real sockets with uvicorn.
+    """
+
+    def __init__(self, latency: float = 0.0, status_code: int = 201,
+                 fail_numbers: Optional[List[str]] = None):
+        self.latency = latency
+        self.status_code = status_code
+        self.fail_numbers = set(fail_numbers or [])
+        self.requests: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def request_count(self) -> int:
+        return len(self.requests)
+
+    @property
+    def recipient_count(self) -> int:
+        return sum(len(request["to"]) for request in self.requests)
+
+    def _recipient(self, number: str) -> Dict[str, Any]:
+        if number in self.fail_numbers:
+            return {"statusCode": 403, "number": number, "status": "InvalidPhoneNumber",
+                    "cost": "0", "messageId": "None"}
+        return {"statusCode": 101, "number": number, "status": "Success",
+                "cost": "KES 0.8000", "messageId": f"ATPid_fake_{number[-8:]}"}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        numbers = [number for number in form.get("to", "").split(",") if number]
+        self.requests.append({"to": numbers, "message": form.get("message"),
+                              "headers": dict(scope.get("headers", []))})
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        recipients = [self._recipient(number) for number in numbers]
+        sent = sum(1 for recipient in recipients if recipient["status"] == "Success")
+        payload = json.dumps({
+            "SMSMessageData": {
+                "Message": f"Sent to {sent}/{len(numbers)} Total Cost: KES {0.8 * sent:.4f}",
+                "Recipients": recipients
+            }
+        }).encode()
+
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(payload)).encode())]
+        })
+        await send({"type": "http.response.body", "body": payload})
@@ -36,3 +36,38 @@ def test_protected_endpoint_with_valid_token(client: TestClient, auth_headers):
     """Test that valid tokens allow access"""
     response = client.get("/api/v1/customers/", headers=auth_headers)
     assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_verify_token_caches_validated_claims(monkeypatch):
+    """Test that a repeated bearer token is answered from the token cache"""
+    from fastapi.security import HTTPAuthorizationCredentials
+    from app.services import auth
+
+    token = auth_service.create_access_token({"sub": "cached_user", "scopes": ["read"]})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    decode_calls = []
+    original_decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(1)
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    hits = auth_service.token_cache.hits
+
+    first = await auth_service.verify_token(credentials)
+    second = await auth_service.verify_token(credentials)
+
+    assert first == second
+    assert first["sub"] == "cached_user"
+    assert len(decode_calls) == 1
+    assert auth_service.token_cache.hits == hits + 1
+
+def test_invalid_token_is_not_cached(client: TestClient):
+    """Test that rejected tokens are never cached"""
+    size = len(auth_service.token_cache)
+    headers = {"Authorization": "Bearer invalid-token"}
+    assert client.get("/api/v1/customers/", headers=headers).status_code == 401
+    assert client.get("/api/v1/customers/", headers=headers).status_code == 401
+    assert len(auth_service.token_cache) == size
@@ -0,0 +1,75 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import CompressionMiddleware, negotiate_encoding
+
+BODY = "savannah " * 500
+
+demo = FastAPI()
+demo.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+@demo.get("/large")
+async def large():
+    return PlainTextResponse(BODY)
+
+
+@demo.get("/small")
+async def small():
+    return PlainTextResponse("tiny")
+
+
+@demo.get("/stream")
+async def stream():
+    async def chunks():
+        for _ in range(5):
+            yield BODY.encode()
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def _get(path, accept_encoding):
+    # Read the raw bytes so the client's own decoding does not hide the encoding
+    with TestClient(demo) as client:
+        with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+            return response, b"".join(response.iter_raw())
+
+
+def test_negotiation_honours_q_values():
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("br;q=0, *;q=0.1") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+
+
+def test_large_responses_are_compressed():
+    response, raw = _get("/large", "br")
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw) < len(BODY)
+    assert brotli.decompress(raw).decode() == BODY
+    
+    response, raw = _get("/large", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == BODY
+
+
+def test_small_and_unnegotiated_responses_pass_through():
+    response, raw = _get("/small", "gzip, br")
+    assert "content-encoding" not in response.headers
+    assert raw == b"tiny"
+    
+    response, raw = _get("/large", "identity")
+    assert "content-encoding" not in response.headers
+    assert raw.decode() == BODY
+
+
+def test_streaming_responses_are_compressed_per_chunk():
+    response, raw = _get("/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode() == BODY * 5
@@ -0,0 +1,136 @@
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, insert, select
+
+from app.models.customer import Customer
+from app.models.notification import NotificationOutbox
+from app.models.order import Order
+from app.services.customer_cache import CustomerCache, InMemoryCacheBackend
+from tests.conftest import TestingSessionLocal, engine
+
+
+def _seed_customer(customer_id="cust-1", name="Cached Customer"):
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [{
+            "id": customer_id,
+            "name": name,
+            "code": customer_id.upper(),
+            "phone_number": "+254700123470"
+        }])
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_served_from_the_local_tier(tables):
+    _seed_customer()
+    cache = CustomerCache(maxsize=10, ttl=60)
+    async with TestingSessionLocal() as db:
+        first = await cache.get(db, "cust-1")
+        second = await cache.get(db, "cust-1")
+        assert await cache.get(db, "missing") is None
+
+    assert first == second
+    assert first.name == "Cached Customer"
+    stats = cache.stats()
+    assert stats["db_loads"] == 2  # The first lookup and the miss
+    assert stats["local_hits"] == 1
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_fills_other_workers_and_honours_invalidation(tables):
+    _seed_customer()
+    shared = InMemoryCacheBackend()
+    worker_a = CustomerCache(maxsize=10, ttl=60, shared=shared)
+    worker_b = CustomerCache(maxsize=10, ttl=60, shared=shared)
+    async with TestingSessionLocal() as db:
+        await worker_a.get(db, "cust-1")
+        customer = await worker_b.get(db, "cust-1")
+        assert customer.name == "Cached Customer"
+        assert worker_b.stats()["shared_hits"] == 1
+        assert worker_b.stats()["db_loads"] == 0
+
+        await worker_a.invalidate("cust-1")
+        assert await shared.get("customer:cust-1") is None
+
+
+@pytest.mark.asyncio
+async def test_get_many_loads_only_the_misses(tables):
+    for customer_id in ("cust-1", "cust-2", "cust-3"):
+        _seed_customer(customer_id)
+    cache = CustomerCache(maxsize=10, ttl=60)
+    async with TestingSessionLocal() as db:
+        await cache.get(db, "cust-1")
+        customers = await cache.get_many(db, ["cust-1", "cust-2", "cust-3", "missing"])
+
+    assert set(customers) == {"cust-1", "cust-2", "cust-3"}
+    assert cache.stats()["db_loads"] == 2
+
+
+def test_customer_update_and_delete_invalidate_the_cache(client: TestClient, auth_headers):
+    customer_id = client.post("/api/v1/customers/", json={
+        "name": "Before Rename",
+        "code": "CUST018",
+        "phone_number": "+254700123471"
+    }, headers=auth_headers).json()["id"]
+    order = {
+        "customer_id": customer_id,
+        "item": "Item",
+        "amount": 100.00,
+        "time": datetime.now().isoformat(),
+        "description": "Cached order"
+    }
+    assert client.post("/api/v1/orders/", json=order, headers=auth_headers).status_code == 201
+
+    client.put(f"/api/v1/customers/{customer_id}", json={"name": "After Rename"},
+               headers=auth_headers)
+    assert client.post("/api/v1/orders/", json=order, headers=auth_headers).status_code == 201
+    with engine.connect() as conn:
+        messages = list(conn.scalars(
+            select(NotificationOutbox.message).order_by(NotificationOutbox.created_at)
+        ))
+    assert "Before Rename" in messages[0]
+    assert "After Rename" in messages[1]
+
+    for existing in client.get("/api/v1/orders/", headers=auth_headers).json():
+        client.delete(f"/api/v1/orders/{existing['id']}", headers=auth_headers)
+    client.delete(f"/api/v1/customers/{customer_id}", headers=auth_headers)
+    response = client.post("/api/v1/orders/", json=order, headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_order_for_customer_deleted_elsewhere_is_404(client: TestClient, auth_headers):
+    from app.services.customer_cache import customer_cache
+
+    customer_id = client.post("/api/v1/customers/", json={
+        "name": "Deleted Elsewhere",
+        "code": "CUST019",
+        "phone_number": "+254700123472"
+    }, headers=auth_headers).json()["id"]
+    order = {
+        "customer_id": customer_id,
+        "item": "Item",
+        "amount": 100.00,
+        "time": datetime.now().isoformat(),
+        "description": "Stale cache order"
+    }
+    batch = [order, {**order, "item": "Other item"}]
+
+    for url, payload in [("/api/v1/orders/", order), ("/api/v1/orders/batch", batch)]:
+        # Warm this worker's cache, then delete the customer behind its back
+        with engine.begin() as conn:
+            conn.execute(delete(Order))
+        assert client.post(url, json=payload, headers=auth_headers).status_code == 201
+        with engine.begin() as conn:
+            conn.execute(delete(Order))
+            conn.execute(delete(NotificationOutbox))
+            conn.execute(delete(Customer).where(Customer.id == customer_id))
+
+        response = client.post(url, json=payload, headers=auth_headers)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Customer not found"
+        assert customer_cache.local.get(customer_id) is None
+        with engine.connect() as conn:
+            assert conn.scalar(select(func.count()).select_from(Order)) == 0
+
+        _seed_customer(customer_id, "Deleted Elsewhere")
@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.database import apply_sqlite_pragmas, engine_options
+
+
+def test_postgres_engine_uses_pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_POOL_RECYCLE", 600)
+    options = engine_options("postgresql://user:secret@db/orders")
+    assert options["pool_size"] == 7
+    assert options["pool_recycle"] == 600
+    assert options["pool_pre_ping"] is True
+    assert options["echo"] is False
+
+
+def test_in_memory_sqlite_skips_pool_sizing():
+    options = engine_options("sqlite:///:memory:")
+    assert "pool_size" not in options
+    assert options["connect_args"] == {"check_same_thread": False}
+
+
+def test_sqlite_pragmas_are_applied_per_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SQLITE_MMAP_SIZE", None)
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(engine)
+    with engine.connect() as conn:
+        assert conn.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert conn.scalar(text("PRAGMA synchronous")) == 1  # NORMAL
+        assert conn.scalar(text("PRAGMA busy_timeout")) == 5000
+        assert conn.scalar(text("PRAGMA foreign_keys")) == 1
+    engine.dispose()
@@ -0,0 +1,152 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.main import app
+from app.models.idempotency import IdempotencyRecord
+from app.models.notification import NotificationOutbox
+from app.models.order import Order
+from app.services.auth import auth_service
+from app.services.idempotency import idempotency_keys
+from app.services.query_inspector import assert_max_queries
+from tests.conftest import TestingSessionLocal
+
+
+def create_customer(client: TestClient, auth_headers, code: str = "IDEM001") -> str:
+    response = client.post("/api/v1/customers/", json={
+        "name": "Retrying Customer", "code": code, "phone_number": "0712345678"
+    }, headers=auth_headers)
+    return response.json()["id"]
+
+
+def order_body(customer_id: str, amount: float = 1500.0) -> dict:
+    return {"customer_id": customer_id, "item": "Maize flour", "amount": amount,
+            "time": "2025-01-01T10:00:00", "description": "Retried order"}
+
+
+async def count(model) -> int:
+    async with TestingSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+
+def test_retried_order_replays_the_first_response(client: TestClient, auth_headers):
+    customer_id = create_customer(client, auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": "order-42"}
+
+    first = client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+    # Replays read the stored response and touch nothing else
+    with assert_max_queries(2):
+        retry = client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert asyncio.run(count(Order)) == 1
+    assert asyncio.run(count(NotificationOutbox)) == 1
+
+
+def test_key_reused_with_a_different_body_is_rejected(client: TestClient, auth_headers):
+    customer_id = create_customer(client, auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": "order-43"}
+    client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+
+    response = client.post("/api/v1/orders/", json=order_body(customer_id, amount=1.0),
+                           headers=headers)
+    assert response.status_code == 422
+    assert asyncio.run(count(Order)) == 1
+
+
+def test_keys_are_scoped_to_caller_and_endpoint(client: TestClient, auth_headers):
+    customer_id = create_customer(client, auth_headers)
+    other_token = auth_service.create_access_token(
+        data={"sub": "other_user", "scopes": ["read", "write"]})
+    key = {"Idempotency-Key": "shared-key"}
+
+    client.post("/api/v1/orders/", json=order_body(customer_id),
+                headers={**auth_headers, **key})
+    response = client.post("/api/v1/orders/", json=order_body(customer_id),
+                           headers={"Authorization": f"Bearer {other_token}", **key})
+    assert "Idempotent-Replayed" not in response.headers
+    response = client.post("/api/v1/customers/", json={
+        "name": "Other", "code": "IDEM002", "phone_number": "0712345679"
+    }, headers={**auth_headers, **key})
+    assert response.status_code == 201
+    assert asyncio.run(count(Order)) == 2
+
+
+def test_failed_request_is_not_stored(client: TestClient, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "customer-1"}
+    body = {"name": "Jane", "code": "IDEM003", "phone_number": "0712345678"}
+    client.post("/api/v1/customers/", json={**body, "name": "Taken"}, headers=auth_headers)
+
+    assert client.post("/api/v1/customers/", json=body, headers=headers).status_code == 400
+    assert asyncio.run(count(IdempotencyRecord)) == 0
+
+    created = client.post("/api/v1/customers/", json={**body, "code": "IDEM004"},
+                          headers={**auth_headers, "Idempotency-Key": "customer-2"})
+    replayed = client.post("/api/v1/customers/", json={**body, "code": "IDEM004"},
+                           headers={**auth_headers, "Idempotency-Key": "customer-2"})
+    assert created.status_code == replayed.status_code == 201
+    assert replayed.json() == created.json()
+    assert replayed.json()["phone_number"] == "+254712345678"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_run_once(client: TestClient, auth_headers):
+    customer_id = create_customer(client, auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": "burst"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        responses = await asyncio.gather(*[
+            async_client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+            for _ in range(5)
+        ])
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 4
+    assert await count(Order) == 1
+
+
+@pytest.mark.asyncio
+async def test_compaction_removes_expired_keys(client: TestClient, auth_headers):
+    customer_id = create_customer(client, auth_headers)
+    headers = {**auth_headers, "Idempotency-Key": "expiring"}
+    client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+
+    async with TestingSessionLocal() as db:
+        assert await idempotency_keys.compact(db) == 0
+        later = datetime.utcnow() + timedelta(seconds=idempotency_keys.ttl + 1)
+        assert await idempotency_keys.compact(db, now=later) == 1
+    assert await count(IdempotencyRecord) == 0
+
+    # Once expired, the key starts a new request
+    response = client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+    assert "Idempotent-Replayed" not in response.headers
+    assert await count(Order) == 2
+
+
+def test_overlong_key_is_rejected(client: TestClient, auth_headers):
+    response = client.post("/api/v1/customers/", json={
+        "name": "Jane", "code": "IDEM005", "phone_number": "0712345678"
+    }, headers={**auth_headers, "Idempotency-Key": "k" * 256})
+    assert response.status_code == 400
+
+
+def test_expired_key_is_reclaimed_before_compaction(client: TestClient, auth_headers,
+                                                    monkeypatch):
+    customer_id = create_customer(client, auth_headers)
+    monkeypatch.setattr(idempotency_keys, "ttl", -1)
+    headers = {**auth_headers, "Idempotency-Key": "stale"}
+
+    first = client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+    second = client.post("/api/v1/orders/", json=order_body(customer_id), headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.json()["id"] != first.json()["id"]
+    assert asyncio.run(count(IdempotencyRecord)) == 1
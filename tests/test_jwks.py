@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwk, jwt
+
+from app.config import settings
+from app.services.auth import AuthService
+from app.services.jwks import JWKSCache
+
+JWKS_URI = "https://issuer.test/.well-known/jwks.json"
+
+
+def make_key(alg: str, kid: str):
+    if alg == "RS256":
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private = ec.generate_private_key(ec.SECP256R1())
+    pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                serialization.NoEncryption())
+    public = jwk.construct(pem, alg).public_key().to_dict()
+    public["kid"] = kid
+    return pem, public
+
+
+class JWKSServer:
+    """Locally served JWKS document whose key set can be rotated"""
+
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.requests = 0
+        self.latency = 0.0
+        self.transport = httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return httpx.Response(200, json={"keys": self.keys})
+
+
+def sign(pem: bytes, alg: str, kid: str, **claims) -> str:
+    now = int(time.time())
+    payload = {"iss": settings.OIDC_ISSUER, "aud": settings.OIDC_CLIENT_ID, "sub": "issuer-user",
+               "iat": now, "exp": now + 300, "scopes": ["read"], **claims}
+    return jwt.encode(payload, pem, algorithm=alg, headers={"kid": kid})
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("alg", ["RS256", "ES256"])
+async def test_verify_token_with_jwks_key(alg):
+    pem, public = make_key(alg, "key-1")
+    server = JWKSServer(public)
+    service = AuthService(jwks=JWKSCache(JWKS_URI, transport=server.transport))
+
+    user = await service.verify_token(bearer(sign(pem, alg, "key-1")))
+    await service.jwks.aclose()
+
+    assert user["sub"] == "issuer-user"
+    assert server.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_token_signed_by_other_key_is_rejected():
+    _, public = make_key("RS256", "key-1")
+    other_pem, _ = make_key("RS256", "key-1")
+    server = JWKSServer(public)
+    service = AuthService(jwks=JWKSCache(JWKS_URI, transport=server.transport))
+
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(bearer(sign(other_pem, "RS256", "key-1")))
+    await service.jwks.aclose()
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_key_rotation_refetches_once_for_concurrent_requests():
+    old_pem, old_public = make_key("RS256", "old")
+    new_pem, new_public = make_key("RS256", "new")
+    server = JWKSServer(old_public)
+    cache = JWKSCache(JWKS_URI, min_refetch_interval=0, transport=server.transport)
+    service = AuthService(jwks=cache)
+
+    await service.verify_token(bearer(sign(old_pem, "RS256", "old")))
+    server.keys = [old_public, new_public]
+    server.latency = 0.02
+
+    tokens = [sign(new_pem, "RS256", "new", sub=f"user-{i}") for i in range(20)]
+    users = await asyncio.gather(*[service.verify_token(bearer(token)) for token in tokens])
+    await cache.aclose()
+
+    assert {user["sub"] for user in users} == {f"user-{i}" for i in range(20)}
+    assert server.requests == 2  # Initial fetch plus a single shared refetch
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refetch_is_rate_limited():
+    pem, public = make_key("RS256", "key-1")
+    server = JWKSServer(public)
+    cache = JWKSCache(JWKS_URI, min_refetch_interval=60, transport=server.transport)
+
+    assert await cache.get_key("key-1") is not None
+    for _ in range(5):
+        assert await cache.get_key("unknown") is None
+    await cache.aclose()
+
+    assert server.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_are_refreshed_ahead_of_expiry():
+    _, public = make_key("ES256", "key-1")
+    server = JWKSServer(public)
+    cache = JWKSCache(JWKS_URI, ttl=10, refresh_ahead=20, transport=server.transport)
+
+    await cache.get_key("key-1")
+    # Inside the refresh-ahead window: served from cache, refreshed in the background
+    assert await cache.get_key("key-1") is not None
+    await asyncio.sleep(0)
+    await cache._inflight
+    await cache.aclose()
+
+    assert server.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_keys_are_served_when_refresh_fails():
+    _, public = make_key("RS256", "key-1")
+    server = JWKSServer(public)
+    cache = JWKSCache(JWKS_URI, ttl=0, transport=server.transport)
+    await cache.get_key("key-1")
+
+    async def fail(request):
+        raise httpx.ConnectError("issuer down")
+    cache._transport = httpx.MockTransport(fail)
+    cache._client = None
+
+    assert await cache.get_key("key-1") is not None
+    await cache.aclose()
+
+
+@pytest.mark.asyncio
+async def test_algorithm_mismatch_with_jwk_is_rejected():
+    pem, public = make_key("RS256", "key-1")
+    public["alg"] = "ES256"
+    server = JWKSServer(public)
+    service = AuthService(jwks=JWKSCache(JWKS_URI, transport=server.transport))
+
+    with pytest.raises(HTTPException) as exc:
+        await service.verify_token(bearer(sign(pem, "RS256", "key-1")))
+    await service.jwks.aclose()
+    assert exc.value.status_code == 401
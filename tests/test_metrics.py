@@ -0,0 +1,108 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from app.services.metrics import registry, render
+from app.services.sms import SMSService
+from tests.fakes import FakeATEndpoint
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+def observations(histogram, **labels):
+    return sample(f"{histogram}_count", **labels)
+
+
+def test_render_uses_prometheus_text_format():
+    target = CollectorRegistry()
+    requests = Counter("requests_total", "Requests", ["path"], registry=target)
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=target)
+    requests.labels('/a"b\\c\nd').inc()
+    requests.labels('/a"b\\c\nd').inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = render(target).splitlines()
+    assert "# TYPE requests_total counter" in lines
+    # Quotes, backslashes and newlines in label values are escaped
+    assert 'requests_total{path="/a\\"b\\\\c\\nd"} 3.0' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1.0' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2.0' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3.0' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3.0" in lines
+    assert not any("_created" in line for line in lines)
+
+
+def test_requests_are_labelled_by_route_template(client: TestClient, auth_headers):
+    route = "/api/v1/customers/{customer_id}"
+    found = sample("http_requests_total", method="GET", route=route, status="200")
+    missing = sample("http_requests_total", method="GET", route=route, status="404")
+    queries = sample("http_request_db_queries_count", route=route)
+    statements = sample("http_request_db_queries_sum", route=route)
+
+    customer = client.post("/api/v1/customers/", json={
+        "name": "Jane Doe", "code": "MET001", "phone_number": "+254700123456"
+    }, headers=auth_headers).json()
+    client.get(f"/api/v1/customers/{customer['id']}", headers=auth_headers)
+    client.get("/api/v1/customers/unknown", headers=auth_headers)
+
+    assert sample("http_requests_total", method="GET", route=route, status="200") == found + 1
+    assert sample("http_requests_total", method="GET", route=route, status="404") == missing + 1
+    # Each lookup ran its SELECT inside the request
+    assert sample("http_request_db_queries_count", route=route) == queries + 2
+    assert sample("http_request_db_queries_sum", route=route) >= statements + 2
+
+
+def test_auth_timings_distinguish_cache_hits(client: TestClient, auth_headers):
+    verified = observations("auth_verify_duration_seconds", result="verified")
+    cached = observations("auth_verify_duration_seconds", result="cached")
+    rejected = observations("auth_verify_duration_seconds", result="rejected")
+
+    from app.services.auth import auth_service
+    auth_service.token_cache.clear()
+    client.get("/api/v1/customers/", headers=auth_headers)
+    client.get("/api/v1/customers/", headers=auth_headers)
+    client.get("/api/v1/customers/", headers={"Authorization": "Bearer not-a-token"})
+
+    assert observations("auth_verify_duration_seconds", result="verified") == verified + 1
+    assert observations("auth_verify_duration_seconds", result="cached") == cached + 1
+    assert observations("auth_verify_duration_seconds", result="rejected") == rejected + 1
+
+
+@pytest.mark.asyncio
+async def test_sms_requests_are_timed_by_outcome():
+    success = observations("sms_request_duration_seconds", outcome="success")
+    rejected = observations("sms_request_duration_seconds", outcome="rejected")
+
+    service = SMSService(transport=httpx.ASGITransport(app=FakeATEndpoint()))
+    await service.send_order_notification("0700123456", "Jane", "Laptop", 1)
+    await service.aclose()
+    failing = SMSService(transport=httpx.ASGITransport(app=FakeATEndpoint(status_code=500)))
+    await failing.send_order_notification("0700123456", "Jane", "Laptop", 1)
+    await failing.aclose()
+
+    assert observations("sms_request_duration_seconds", outcome="success") == success + 1
+    assert observations("sms_request_duration_seconds", outcome="rejected") == rejected + 1
+
+
+def test_metrics_endpoint_exposes_request_and_cache_metrics(client: TestClient, auth_headers):
+    client.get("/api/v1/customers/", headers=auth_headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/customers/",status="200"}' in body
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in body
+    assert 'app_cache_hits_total{cache="auth_tokens"}' in body
+    assert 'app_cache_entries{cache="customers"}' in body
+    assert 'app_cache_hits_total{cache="customers_shared"}' in body
+    assert 'app_cache_misses_total{cache="customers_shared"}' in body
+    assert 'app_cache_loads_total{cache="customers"}' in body
+    assert 'app_cache_hit_ratio{cache="customers"}' in body
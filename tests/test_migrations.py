@@ -0,0 +1,55 @@
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+from app.models.customer import include_name
+
+
+def alembic_config(url: str) -> Config:
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    command.upgrade(alembic_config(url), "head")
+
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_name": include_name})
+        diff = compare_metadata(context, Base.metadata)
+    engine.dispose()
+
+    assert diff == []
+
+
+def test_migrations_downgrade_to_base(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = alembic_config(url)
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+
+
+def test_search_migration_normalizes_and_indexes_existing_customers(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = alembic_config(url)
+    command.upgrade(config, "0004")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO customers (id, name, code, phone_number, created_at) "
+            "VALUES ('c1', 'Legacy Customer', 'LEG001', '0712 345 678', CURRENT_TIMESTAMP)"
+        ))
+
+    command.upgrade(config, "head")
+    with engine.connect() as connection:
+        assert connection.scalar(text("SELECT phone_number FROM customers")) == "+254712345678"
+        matches = connection.scalars(text(
+            "SELECT rowid FROM customers_fts WHERE customers_fts MATCH '\"legacy\"*'"
+        )).all()
+        assert len(matches) == 1
+    engine.dispose()
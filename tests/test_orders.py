@@ -2,6 +2,8 @@ import pytest
 from fastapi.testclient import TestClient
 from datetime import datetime
 
+from app.services.query_inspector import assert_max_queries
+
 def test_create_order(client: TestClient, auth_headers):
     # First create a customer
     customer_data = {
@@ -21,7 +23,9 @@ def test_create_order(client: TestClient, auth_headers):
         "description": "High-end laptop for business use"
     }
     
-    response = client.post("/api/v1/orders/", json=order_data, headers=auth_headers)
+    # Customer lookup, order INSERT and outbox INSERT
+    with assert_max_queries(3):
+        response = client.post("/api/v1/orders/", json=order_data, headers=auth_headers)
     assert response.status_code == 201
     
     data = response.json()
@@ -67,7 +71,8 @@ def test_get_orders_by_customer(client: TestClient, auth_headers):
     client.post("/api/v1/orders/", json=order_data, headers=auth_headers)
     
     # Get orders for specific customer
-    response = client.get(f"/api/v1/orders/?customer_id={customer_id}", headers=auth_headers)
+    with assert_max_queries(1):
+        response = client.get(f"/api/v1/orders/?customer_id={customer_id}", headers=auth_headers)
     assert response.status_code == 200
     
     data = response.json()
@@ -95,7 +100,8 @@ def test_get_order_by_id(client: TestClient, auth_headers):
     order_id = order_response.json()["id"]
     
     # Get order by ID
-    response = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers)
+    with assert_max_queries(1):
+        response = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers)
     assert response.status_code == 200
     
     data = response.json()
@@ -124,7 +130,9 @@ def test_update_order(client: TestClient, auth_headers):
     
     # Update order
     update_data = {"item": "New Item", "amount": 15000.00}
-    response = client.put(f"/api/v1/orders/{order_id}", json=update_data, headers=auth_headers)
+    with assert_max_queries(1):
+        response = client.put(f"/api/v1/orders/{order_id}", json=update_data,
+                              headers=auth_headers)
     assert response.status_code == 200
     
     data = response.json()
@@ -152,10 +160,238 @@ def test_delete_order(client: TestClient, auth_headers):
     order_id = order_response.json()["id"]
     
     # Delete order
-    response = client.delete(f"/api/v1/orders/{order_id}", headers=auth_headers)
+    with assert_max_queries(1):
+        response = client.delete(f"/api/v1/orders/{order_id}", headers=auth_headers)
     assert response.status_code == 200
     assert "deleted successfully" in response.json()["message"]
     
     # Verify order is deleted
     get_response = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers)
     assert get_response.status_code == 404
+
+def test_get_orders_cursor_pagination_by_customer(client: TestClient, auth_headers):
+    customer_ids = []
+    for code in ("CUST011", "CUST012"):
+        response = client.post("/api/v1/customers/", json={
+            "name": "Paged Order Customer",
+            "code": code,
+            "phone_number": "+254700123466"
+        }, headers=auth_headers)
+        customer_ids.append(response.json()["id"])
+    
+    created = []
+    for i in range(5):
+        for customer_id in customer_ids:
+            response = client.post("/api/v1/orders/", json={
+                "customer_id": customer_id,
+                "item": f"Item {i}",
+                "amount": 100.00 + i,
+                "time": datetime.now().isoformat(),
+                "description": "Paged order"
+            }, headers=auth_headers)
+            if customer_id == customer_ids[0]:
+                created.append(response.json()["id"])
+    
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get("/api/v1/orders/", params={
+            "cursor": cursor, "limit": 2, "customer_id": customer_ids[0]
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert all(order["customer_id"] == customer_ids[0] for order in page["items"])
+        seen.extend(order["id"] for order in page["items"])
+        cursor = page["next_cursor"]
+    
+    assert seen == created
+
+def test_create_orders_batch(client: TestClient, auth_headers):
+    customer_ids = []
+    for code in ("CUST013", "CUST014"):
+        response = client.post("/api/v1/customers/", json={
+            "name": f"Batch {code}",
+            "code": code,
+            "phone_number": "0700123467"
+        }, headers=auth_headers)
+        customer_ids.append(response.json()["id"])
+    
+    orders = [{
+        "customer_id": customer_ids[i % 2],
+        "item": f"Batch Item {i}",
+        "amount": 100.00 * (i + 1),
+        "time": datetime.now().isoformat(),
+        "description": "Batched order"
+    } for i in range(6)]
+    # One customer lookup for all rows, one INSERT each for orders and outbox
+    with assert_max_queries(3):
+        response = client.post("/api/v1/orders/batch", json=orders, headers=auth_headers)
+    assert response.status_code == 201
+    
+    data = response.json()
+    assert [order["item"] for order in data] == [order["item"] for order in orders]
+    assert all(order["id"] and order["created_at"] for order in data)
+    
+    listed = client.get(f"/api/v1/orders/?customer_id={customer_ids[0]}", headers=auth_headers)
+    assert len(listed.json()) == 3
+    
+    from sqlalchemy import select
+    from app.models.notification import NotificationOutbox
+    from tests.conftest import engine
+    with engine.connect() as conn:
+        keys = set(conn.scalars(select(NotificationOutbox.idempotency_key)))
+    assert keys == {f"order-created:{order['id']}" for order in data}
+
+def test_create_orders_batch_rejects_unknown_customer(client: TestClient, auth_headers):
+    customer_response = client.post("/api/v1/customers/", json={
+        "name": "Batch Missing",
+        "code": "CUST015",
+        "phone_number": "+254700123468"
+    }, headers=auth_headers)
+    orders = [{
+        "customer_id": customer_id,
+        "item": "Item",
+        "amount": 100.00,
+        "time": datetime.now().isoformat(),
+        "description": "Batched order"
+    } for customer_id in (customer_response.json()["id"], "missing-customer")]
+    
+    response = client.post("/api/v1/orders/batch", json=orders, headers=auth_headers)
+    assert response.status_code == 404
+    assert "missing-customer" in response.json()["detail"]
+    assert client.get("/api/v1/orders/", headers=auth_headers).json() == []
+
+def test_export_orders_streams_filtered_rows(client: TestClient, auth_headers, monkeypatch):
+    import csv
+    import io
+    import json
+    from app.config import settings
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 2)
+    
+    customer_ids = []
+    for code in ("CUST016", "CUST017"):
+        response = client.post("/api/v1/customers/", json={
+            "name": "Export Customer",
+            "code": code,
+            "phone_number": "+254700123469"
+        }, headers=auth_headers)
+        customer_ids.append(response.json()["id"])
+    
+    orders = [{
+        "customer_id": customer_ids[i % 2],
+        "item": f"Export Item {i}",
+        "amount": 10.0 * (i + 1),
+        "time": f"2025-01-{i + 1:02d}T12:00:00",
+        "description": "Exported order"
+    } for i in range(5)]
+    client.post("/api/v1/orders/batch", json=orders, headers=auth_headers)
+    
+    # Streamed from one server-side cursor, however many chunks
+    with assert_max_queries(1):
+        response = client.get("/api/v1/orders/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["item"] for row in rows] == [order["item"] for order in orders]
+    assert rows[0]["time"] == "2025-01-01T12:00:00"
+    
+    response = client.get("/api/v1/orders/export", params={
+        "format": "csv",
+        "start": "2025-01-02T00:00:00",
+        "end": "2025-01-05T00:00:00",
+        "customer_id": customer_ids[1]
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [record["item"] for record in records] == ["Export Item 1", "Export Item 3"]
+    assert float(records[1]["amount"]) == 40.0
+
+def test_order_conditional_requests(client: TestClient, auth_headers):
+    customer_response = client.post("/api/v1/customers/", json={
+        "name": "ETag Order Customer",
+        "code": "CUST019",
+        "phone_number": "+254700123472"
+    }, headers=auth_headers)
+    order_id = client.post("/api/v1/orders/", json={
+        "customer_id": customer_response.json()["id"],
+        "item": "Item",
+        "amount": 100.00,
+        "time": datetime.now().isoformat(),
+        "description": "Conditional order"
+    }, headers=auth_headers).json()["id"]
+    
+    etag = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers).headers["ETag"]
+    response = client.get(f"/api/v1/orders/{order_id}",
+                          headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    
+    page = client.get("/api/v1/orders/?cursor=", headers=auth_headers)
+    response = client.get("/api/v1/orders/?cursor=",
+                          headers={**auth_headers, "If-None-Match": page.headers["ETag"]})
+    assert response.status_code == 304
+    
+    response = client.put(f"/api/v1/orders/{order_id}", json={"amount": 200.00},
+                          headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 200
+    response = client.put(f"/api/v1/orders/{order_id}", json={"amount": 300.00},
+                          headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 412
+    assert float(client.get(f"/api/v1/orders/{order_id}",
+                            headers=auth_headers).json()["amount"]) == 200.00
+
+def test_order_list_matches_schema_serialization(client: TestClient, auth_headers):
+    customer_response = client.post("/api/v1/customers/", json={
+        "name": "Serialization Customer",
+        "code": "CUST021",
+        "phone_number": "+254700123474"
+    }, headers=auth_headers)
+    order_id = client.post("/api/v1/orders/", json={
+        "customer_id": customer_response.json()["id"],
+        "item": "Item",
+        "amount": 1234.5,
+        "time": "2025-01-01T12:00:00.123456",
+        "description": "Serialized order"
+    }, headers=auth_headers).json()["id"]
+    
+    # The list fast path must render rows exactly as the Pydantic schema does
+    detail = client.get(f"/api/v1/orders/{order_id}", headers=auth_headers).json()
+    listed = client.get("/api/v1/orders/", headers=auth_headers).json()
+    assert listed == [detail]
+    page = client.get("/api/v1/orders/?cursor=", headers=auth_headers).json()
+    assert page == {"items": [detail], "next_cursor": None}
+
+def test_order_list_field_projection(client: TestClient, auth_headers):
+    customer_response = client.post("/api/v1/customers/", json={
+        "name": "Projection Customer",
+        "code": "CUST022",
+        "phone_number": "+254700123475"
+    }, headers=auth_headers)
+    client.post("/api/v1/orders/batch", json=[{
+        "customer_id": customer_response.json()["id"],
+        "item": f"Item {i}",
+        "amount": 100.0 + i,
+        "time": "2025-01-01T12:00:00",
+        "description": "x" * 500
+    } for i in range(3)], headers=auth_headers)
+    
+    response = client.get("/api/v1/orders/?fields=amount,id", headers=auth_headers)
+    assert response.status_code == 200
+    assert [set(item) for item in response.json()] == [{"id", "amount"}] * 3
+    full = client.get("/api/v1/orders/", headers=auth_headers)
+    assert response.headers["ETag"] != full.headers["ETag"]
+    
+    page = client.get("/api/v1/orders/?cursor=&limit=2&fields=time", headers=auth_headers).json()
+    assert page["items"] == [{"time": "2025-01-01T12:00:00"}] * 2
+    assert page["next_cursor"]
+    
+    response = client.get("/api/v1/orders/?fields=amount,secret", headers=auth_headers)
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+def test_list_limit_is_bounded(client: TestClient, auth_headers):
+    for path in ["/api/v1/orders/", "/api/v1/customers/"]:
+        for params in [{"limit": -1}, {"limit": 0}, {"limit": 1001}, {"cursor": "", "limit": -1},
+                       {"skip": -1}]:
+            response = client.get(path, params=params, headers=auth_headers)
+            assert response.status_code == 422
+        assert client.get(path, params={"limit": 1000}, headers=auth_headers).status_code == 200
@@ -0,0 +1,179 @@
+import asyncio
+import httpx
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.models.notification import NotificationOutbox
+from app.services.metrics import registry
+from app.services.sms import SMSService
+from app.workers.outbox import OutboxWorker
+from tests.conftest import TestingSessionLocal, engine
+from tests.fakes import FakeATEndpoint
+
+
+def make_worker(endpoint: FakeATEndpoint, **kwargs) -> OutboxWorker:
+    service = SMSService(transport=httpx.ASGITransport(app=endpoint))
+    return OutboxWorker(session_factory=TestingSessionLocal, service=service, **kwargs)
+
+
+def sample(name):
+    return registry.get_sample_value(name) or 0
+
+
+async def add_rows(*rows: NotificationOutbox):
+    async with TestingSessionLocal() as db:
+        db.add_all(rows)
+        await db.commit()
+
+
+async def all_rows():
+    async with TestingSessionLocal() as db:
+        query = select(NotificationOutbox).order_by(NotificationOutbox.phone_number)
+        result = await db.scalars(query)
+        return result.all()
+
+
+def test_create_order_writes_outbox_row(client: TestClient, auth_headers, fake_at):
+    customer_response = client.post("/api/v1/customers/", json={
+        "name": "Outbox Customer",
+        "code": "CUST100",
+        "phone_number": "0700123470"
+    }, headers=auth_headers)
+    order_response = client.post("/api/v1/orders/", json={
+        "customer_id": customer_response.json()["id"],
+        "item": "Radio",
+        "amount": 1500.00,
+        "time": datetime.now().isoformat(),
+        "description": "Portable radio"
+    }, headers=auth_headers)
+    order_id = order_response.json()["id"]
+
+    with engine.connect() as conn:
+        row = conn.execute(select(NotificationOutbox)).one()
+
+    assert row.idempotency_key == f"order-created:{order_id}"
+    assert row.phone_number == "+254700123470"
+    assert "Radio" in row.message
+    assert row.status == "pending"
+    # Nothing goes out on the request path
+    assert fake_at.request_count == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_sends_grouped_batch_and_marks_sent(tables):
+    endpoint = FakeATEndpoint()
+    await add_rows(
+        NotificationOutbox(idempotency_key="k1", phone_number="+254700000001", message="same"),
+        NotificationOutbox(idempotency_key="k2", phone_number="+254700000002", message="same"),
+        NotificationOutbox(idempotency_key="k3", phone_number="+254700000003", message="other"),
+    )
+
+    batches = sample("outbox_batch_size_count")
+    requests = sample("outbox_sms_requests_total")
+    groups = sample("outbox_batch_groups_sum")
+
+    worker = make_worker(endpoint)
+    assert await worker.drain_once() == 3
+    assert await worker.drain_once() == 0
+    await worker.service.aclose()
+
+    assert endpoint.request_count == 2
+    # Only the non-empty drain counts as a batch
+    assert sample("outbox_batch_size_count") == batches + 1
+    assert sample("outbox_batch_groups_sum") == groups + 2
+    assert sample("outbox_sms_requests_total") == requests + 2
+    rows = await all_rows()
+    assert all(row.status == "sent" and row.attempts == 1 for row in rows)
+    assert all(row.provider_message_id for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_worker_backs_off_failed_recipients(tables):
+    endpoint = FakeATEndpoint(fail_numbers=["+254700000002"])
+    await add_rows(
+        NotificationOutbox(idempotency_key="k1", phone_number="+254700000001", message="same"),
+        NotificationOutbox(idempotency_key="k2", phone_number="+254700000002", message="same"),
+    )
+
+    failed = sample("outbox_failed_recipients_total")
+
+    worker = make_worker(endpoint)
+    before = datetime.utcnow()
+    await worker.drain_once()
+    await worker.service.aclose()
+    assert sample("outbox_failed_recipients_total") == failed + 1
+
+    delivered, rejected = await all_rows()
+    assert delivered.status == "sent"
+    assert rejected.status == "pending"
+    assert rejected.attempts == 1
+    assert "InvalidPhoneNumber" in rejected.last_error
+    assert rejected.next_attempt_at >= before + timedelta(
+        seconds=settings.OUTBOX_BACKOFF_BASE_SECONDS / 2)
+    # Not due yet, so a second drain leaves it alone
+    assert await make_worker(endpoint).drain_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_gives_up_after_max_attempts(tables, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+    endpoint = FakeATEndpoint(status_code=500)
+    await add_rows(NotificationOutbox(idempotency_key="k1", phone_number="+254700000001",
+                                      message="hello", attempts=1))
+
+    worker = make_worker(endpoint)
+    await worker.drain_once()
+    await worker.service.aclose()
+
+    (row,) = await all_rows()
+    assert row.status == "failed"
+    assert row.attempts == 2
+    assert "API Error: 500" in row.last_error
+
+
+@pytest.mark.asyncio
+async def test_worker_reclaims_expired_lease(tables):
+    endpoint = FakeATEndpoint()
+    await add_rows(NotificationOutbox(idempotency_key="k1", phone_number="+254700000001",
+                                      message="hello", status="sending",
+                                      locked_until=datetime.utcnow() - timedelta(seconds=1)))
+
+    worker = make_worker(endpoint)
+    assert await worker.drain_once() == 1
+    await worker.service.aclose()
+    (row,) = await all_rows()
+    assert row.status == "sent"
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_is_unique(tables):
+    await add_rows(NotificationOutbox(idempotency_key="order-created:1",
+                                      phone_number="+254700000001", message="hello"))
+    with pytest.raises(IntegrityError):
+        await add_rows(NotificationOutbox(idempotency_key="order-created:1",
+                                          phone_number="+254700000001", message="hello"))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_never_claim_the_same_row(tables):
+    await add_rows(*[
+        NotificationOutbox(idempotency_key=f"k{i}", phone_number=f"+2547000{i:05d}",
+                           message="same")
+        for i in range(60)
+    ])
+    workers = [make_worker(FakeATEndpoint(), batch_size=7) for _ in range(4)]
+
+    async def claim(worker: OutboxWorker):
+        async with TestingSessionLocal() as db:
+            return [row.id for row in await worker._claim(db, datetime.utcnow())]
+
+    claimed = []
+    for _ in range(10):
+        for ids in await asyncio.gather(*[claim(worker) for worker in workers]):
+            claimed.extend(ids)
+
+    assert len(claimed) == len(set(claimed)) == 60
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.middleware.query_inspector import QueryInspectorMiddleware
+from app.models.customer import Customer
+from app.models.order import Order
+from app.services.query_inspector import (
+    QueryBudgetExceeded, assert_max_queries, record_queries, statement_shape
+)
+from tests.conftest import TestingSessionLocal
+
+
+def test_statement_shape_ignores_literals_and_in_list_length():
+    assert statement_shape("SELECT *  FROM orders\n WHERE id IN (?, ?, ?) LIMIT 10") == \
+        statement_shape("SELECT * FROM orders WHERE id IN (?) LIMIT 20") == \
+        "SELECT * FROM orders WHERE id IN (...) LIMIT ?"
+    assert statement_shape("SELECT * FROM customers WHERE code = 'C1'") == \
+        "SELECT * FROM customers WHERE code = ?"
+
+
+async def seed(count: int):
+    async with TestingSessionLocal() as db:
+        for i in range(count):
+            customer = Customer(name=f"Customer {i}", code=f"N{i:03d}",
+                                phone_number="+254700000000")
+            customer.orders.append(Order(item="Item", amount=1, time=datetime(2025, 1, 1),
+                                         description="Order"))
+            db.add(customer)
+        await db.commit()
+
+
+def load_orders_lazily(session):
+    return sum(len(customer.orders) for customer in session.query(Customer))
+
+
+@pytest.mark.asyncio
+async def test_lazy_loads_exceed_the_budget(tables):
+    await seed(3)
+
+    with pytest.raises(QueryBudgetExceeded, match="Query budget of 1 exceeded") as raised:
+        with assert_max_queries(1):
+            async with TestingSessionLocal() as db:
+                await db.run_sync(load_orders_lazily)
+    assert "3 x SELECT orders" in str(raised.value)
+
+    with assert_max_queries(1):
+        async with TestingSessionLocal() as db:
+            await db.execute(select(Customer, Order).join(Order))
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_fail_within_budget(tables):
+    await seed(2)
+
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+        with assert_max_queries(10):
+            async with TestingSessionLocal() as db:
+                await db.run_sync(load_orders_lazily)
+
+    with assert_max_queries(10, allow_repeats=True) as log:
+        async with TestingSessionLocal() as db:
+            await db.run_sync(load_orders_lazily)
+    assert log.count == 3
+
+
+def test_middleware_reports_count_and_warns_on_repeats(tables, caplog):
+    app = FastAPI()
+
+    @app.get("/lazy")
+    async def lazy():
+        async with TestingSessionLocal() as db:
+            return {"orders": await db.run_sync(load_orders_lazily)}
+
+    app.add_middleware(QueryInspectorMiddleware, repeat_threshold=3)
+    asyncio.run(seed(3))
+
+    with caplog.at_level(logging.WARNING, logger="app.middleware.query_inspector"):
+        with record_queries() as log, TestClient(app) as client:
+            response = client.get("/lazy")
+    assert response.json() == {"orders": 3}
+    assert response.headers["X-DB-Query-Count"] == "4"
+    assert log.count == 4
+    assert "Possible N+1 in GET /lazy" in caplog.text
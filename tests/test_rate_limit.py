@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.middleware.admission import AdmissionControlMiddleware
+from app.services.auth import auth_service
+from app.services.rate_limit import BucketPolicy, InMemoryRateLimitBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_refills_at_rate():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    policy = BucketPolicy(rate=2.0, burst=3)
+
+    decisions = [await backend.take("read:alice", policy) for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[2].remaining == 0
+    assert decisions[3].retry_after == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert (await backend.take("read:alice", policy)).allowed
+    # Idle time never banks more than the burst
+    clock.now += 60
+    decisions = [await backend.take("read:alice", policy) for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+
+
+def token_for(subject: str) -> dict:
+    token = auth_service.create_access_token({"sub": subject, "scopes": ["read", "write"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_reads_and_writes_use_separate_buckets_per_subject(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_READ_PER_SECOND", 0.001)
+    monkeypatch.setattr(settings, "RATE_LIMIT_READ_BURST", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_WRITE_PER_SECOND", 0.001)
+    monkeypatch.setattr(settings, "RATE_LIMIT_WRITE_BURST", 1)
+    alice, bob = token_for("alice"), token_for("bob")
+
+    for _ in range(2):
+        assert client.get("/api/v1/customers/", headers=alice).status_code == 200
+    limited = client.get("/api/v1/customers/", headers=alice)
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert limited.headers["RateLimit-Remaining"] == "0"
+
+    # Alice's writes and Bob's reads are unaffected by Alice's exhausted read bucket
+    created = client.post("/api/v1/customers/", json={
+        "name": "Limited Customer", "code": "RATE001", "phone_number": "0712345678"
+    }, headers=alice)
+    assert created.status_code == 201
+    assert client.get("/api/v1/customers/", headers=bob).status_code == 200
+
+    second_write = client.post("/api/v1/customers/", json={
+        "name": "Second Customer", "code": "RATE002", "phone_number": "0712345679"
+    }, headers=alice)
+    assert second_write.status_code == 429
+
+
+def test_disabled_rate_limit_lets_everything_through(client: TestClient, auth_headers,
+                                                     monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_READ_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_READ_PER_SECOND", 0.001)
+    for _ in range(3):
+        assert client.get("/api/v1/customers/", headers=auth_headers).status_code == 200
+
+
+def admission_app(pool_status=lambda: None, **limits):
+    inner = FastAPI()
+    release = asyncio.Event()
+
+    @inner.get("/work")
+    async def work():
+        await release.wait()
+        return {"ok": True}
+
+    @inner.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return AdmissionControlMiddleware(inner, pool_status=pool_status, **limits), release
+
+
+async def in_flight(app: AdmissionControlMiddleware, count: int):
+    while app.in_flight < count:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_admission_sheds_beyond_max_in_flight():
+    app, release = admission_app(max_in_flight=2)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        held = [asyncio.create_task(client.get("/work")) for _ in range(2)]
+        await in_flight(app, 2)
+
+        shed = await client.get("/work")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        # Health checks bypass admission control
+        assert (await client.get("/health")).status_code == 200
+
+        release.set()
+        assert [r.status_code for r in await asyncio.gather(*held)] == [200, 200]
+        assert (await client.get("/work")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_admission_sheds_when_db_pool_queue_is_saturated():
+    usage = {"checked_out": 2}
+    app, release = admission_app(pool_status=lambda: (usage["checked_out"], 2),
+                                 max_in_flight=0, max_pool_waiters=1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # Two requests hold the pool's connections, a third waits for one
+        held = [asyncio.create_task(client.get("/work")) for _ in range(3)]
+        await in_flight(app, 3)
+        assert (await client.get("/work")).status_code == 503
+
+        # Free connections mean the queue is draining, so nothing is shed
+        usage["checked_out"] = 1
+        held.append(asyncio.create_task(client.get("/work")))
+        await in_flight(app, 4)
+
+        release.set()
+        assert all(r.status_code == 200 for r in await asyncio.gather(*held))
@@ -0,0 +1,117 @@
+import pytest
+from datetime import datetime
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import (
+    Base, ReadRouter, SAFE_METHODS, client_key, get_db, get_read_db, get_read_session_factory,
+    to_async_url
+)
+from app.main import app
+from app.models.customer import Customer
+from app.models.order import Order
+from app.services.auth import auth_service
+from app.services.cache import TTLCache
+from tests.test_cache import FakeClock
+
+
+def _database(path, customer_name):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [{
+            "id": "cust-1", "name": customer_name, "code": "REPL001",
+            "phone_number": "+254700123473"
+        }])
+        conn.execute(insert(Order), [{
+            "id": "order-1", "customer_id": "cust-1", "item": customer_name,
+            "amount": 10, "time": datetime(2025, 1, 1), "description": "Replicated order"
+        }])
+    engine.dispose()
+    return async_sessionmaker(
+        create_async_engine(to_async_url(url), poolclass=NullPool),
+        class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+@pytest.fixture
+def replicated(client, tmp_path):
+    # Two independent SQLite files stand in for a primary and a lagging replica
+    router = ReadRouter(_database(tmp_path / "primary.db", "Primary Copy"),
+                        [_database(tmp_path / "replica.db", "Replica Copy")],
+                        sticky_seconds=5)
+    clock = FakeClock()
+    router.recent_writers = TTLCache(maxsize=100, ttl=5, clock=clock)
+
+    async def primary_db(request: Request):
+        writer = client_key(request) if request.method not in SAFE_METHODS else None
+        async with router.write_session(writer) as db:
+            yield db
+
+    async def replica_db(request: Request):
+        async with router.read_session(client_key(request)) as db:
+            yield db
+
+    def replica_factory(request: Request):
+        return router.read_factory(client_key(request))
+
+    app.dependency_overrides[get_db] = primary_db
+    app.dependency_overrides[get_read_db] = replica_db
+    app.dependency_overrides[get_read_session_factory] = replica_factory
+    return clock
+
+
+def test_reads_use_the_replica_until_the_client_writes(client: TestClient, auth_headers,
+                                                       replicated):
+    other_token = auth_service.create_access_token({"sub": "other", "scopes": ["read"]})
+    other_headers = {"Authorization": f"Bearer {other_token}"}
+    
+    response = client.get("/api/v1/customers/cust-1", headers=auth_headers)
+    assert response.json()["name"] == "Replica Copy"
+    
+    client.put("/api/v1/customers/cust-1", json={"name": "Renamed"}, headers=auth_headers)
+    response = client.get("/api/v1/customers/cust-1", headers=auth_headers)
+    assert response.json()["name"] == "Renamed"
+    response = client.get("/api/v1/customers/cust-1", headers=other_headers)
+    assert response.json()["name"] == "Replica Copy"
+    
+    replicated.now += 6
+    response = client.get("/api/v1/customers/cust-1", headers=auth_headers)
+    assert response.json()["name"] == "Replica Copy"
+
+
+def test_export_streams_from_the_replica_until_the_client_writes(
+        client: TestClient, auth_headers, replicated):
+    def exported_items():
+        response = client.get("/api/v1/orders/export", headers=auth_headers)
+        assert response.status_code == 200
+        return [line for line in response.text.splitlines() if line]
+
+    assert "Replica Copy" in exported_items()[0]
+
+    client.put("/api/v1/customers/cust-1", json={"name": "Renamed"}, headers=auth_headers)
+    assert "Primary Copy" in exported_items()[0]
+
+    replicated.now += 6
+    assert "Replica Copy" in exported_items()[0]
+
+
+def test_round_robin_rotates_through_replicas():
+    router = ReadRouter(None, ["a", "b", "c"], strategy="round_robin", sticky_seconds=0)
+    assert [router.choose("client") for _ in range(4)] == [0, 1, 2, 0]
+
+
+def test_least_connections_prefers_idle_replicas():
+    router = ReadRouter(None, ["a", "b", "c"], strategy="least_connections", sticky_seconds=0)
+    router.in_use = [2, 0, 1]
+    assert router.choose() == 1
+    router.in_use = [0, 0, 3]
+    assert {router.choose() for _ in range(4)} == {0, 1}
+
+
+def test_without_replicas_reads_use_the_primary():
+    assert ReadRouter(None).choose("client") is None
@@ -0,0 +1,117 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.services.query_inspector import assert_max_queries
+
+
+@pytest.fixture(params=[False, True], ids=["group-by", "rollup"])
+def rollups(request, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUP_ENABLED", request.param)
+    return request.param
+
+
+def create_customer(client, auth_headers, code):
+    response = client.post("/api/v1/customers/", json={
+        "name": f"Report {code}",
+        "code": code,
+        "phone_number": "+254700123490"
+    }, headers=auth_headers)
+    return response.json()["id"]
+
+
+def create_order(client, auth_headers, customer_id, amount, time):
+    response = client.post("/api/v1/orders/", json={
+        "customer_id": customer_id,
+        "item": "Report Item",
+        "amount": amount,
+        "time": time,
+        "description": "Report order"
+    }, headers=auth_headers)
+    return response.json()["id"]
+
+
+def test_reports_follow_order_writes(client: TestClient, auth_headers, rollups):
+    alice = create_customer(client, auth_headers, "REP001")
+    bob = create_customer(client, auth_headers, "REP002")
+
+    create_order(client, auth_headers, alice, 100.0, "2025-01-01T09:00:00")
+    moved = create_order(client, auth_headers, alice, 50.0, "2025-01-01T18:00:00")
+    deleted = create_order(client, auth_headers, bob, 30.0, "2025-01-02T10:00:00")
+    client.post("/api/v1/orders/batch", json=[{
+        "customer_id": bob,
+        "item": "Batch Item",
+        "amount": 20.0,
+        "time": "2025-01-03T10:00:00",
+        "description": "Report order"
+    }], headers=auth_headers)
+
+    client.put(f"/api/v1/orders/{moved}", json={"amount": 70.0, "time": "2025-01-03T08:00:00"},
+               headers=auth_headers)
+    client.delete(f"/api/v1/orders/{deleted}", headers=auth_headers)
+
+    # Aggregated in the database: one statement however many orders
+    with assert_max_queries(1):
+        response = client.get("/api/v1/reports/customers", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"customer_id": alice, "order_count": 2, "total_amount": 170.0},
+        {"customer_id": bob, "order_count": 1, "total_amount": 20.0},
+    ]
+
+    with assert_max_queries(1):
+        response = client.get("/api/v1/reports/revenue/daily", headers=auth_headers)
+    assert response.json() == [
+        {"day": "2025-01-01", "order_count": 1, "total_amount": 100.0},
+        {"day": "2025-01-03", "order_count": 2, "total_amount": 90.0},
+    ]
+
+    response = client.get("/api/v1/reports/revenue/daily", params={
+        "start": "2025-01-02", "end": "2025-01-03", "customer_id": alice
+    }, headers=auth_headers)
+    assert response.json() == [{"day": "2025-01-03", "order_count": 1, "total_amount": 70.0}]
+
+    with assert_max_queries(2):
+        response = client.get(f"/api/v1/reports/customers/{bob}", params={"end": "2025-01-02"},
+                              headers=auth_headers)
+    assert response.json() == {"customer_id": bob, "order_count": 0, "total_amount": 0.0}
+
+
+def test_customer_summary_unknown_customer(client: TestClient, auth_headers):
+    response = client.get("/api/v1/reports/customers/missing", headers=auth_headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_rebuild_rollups_matches_orders(client: TestClient, auth_headers, monkeypatch):
+    from app.services.rollups import rebuild_rollups
+    from tests.conftest import TestingSessionLocal
+
+    customer_id = create_customer(client, auth_headers, "REP003")
+    create_order(client, auth_headers, customer_id, 10.0, "2025-02-01T09:00:00")
+    create_order(client, auth_headers, customer_id, 15.0, "2025-02-01T19:00:00")
+
+    async with TestingSessionLocal() as db:
+        await rebuild_rollups(db)
+
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUP_ENABLED", True)
+    response = client.get("/api/v1/reports/revenue/daily", headers=auth_headers)
+    assert response.json() == [{"day": "2025-02-01", "order_count": 2, "total_amount": 25.0}]
+
+
+@pytest.mark.asyncio
+async def test_rollup_backfill_command_covers_orders_written_while_disabled(
+        client: TestClient, auth_headers, monkeypatch):
+    from app.services.rollups import _main
+    from tests.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUP_ENABLED", False)
+    customer_id = create_customer(client, auth_headers, "REP004")
+    create_order(client, auth_headers, customer_id, 40.0, "2025-03-01T09:00:00")
+
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUP_ENABLED", True)
+    create_order(client, auth_headers, customer_id, 2.0, "2025-03-01T10:00:00")
+    await _main(TestingSessionLocal)
+
+    response = client.get("/api/v1/reports/revenue/daily", headers=auth_headers)
+    assert response.json() == [{"day": "2025-03-01", "order_count": 2, "total_amount": 42.0}]
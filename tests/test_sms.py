@@ -0,0 +1,67 @@
+import asyncio
+import httpx
+import pytest
+
+from app.services.sms import SMSService
+from tests.fakes import FakeATEndpoint
+
+
+@pytest.mark.asyncio
+async def test_send_order_notification_formats_number_and_message():
+    endpoint = FakeATEndpoint()
+    service = SMSService(transport=httpx.ASGITransport(app=endpoint))
+
+    response = await service.send_order_notification("0700123456", "Jane", "Laptop", 50000)
+    await service.aclose()
+
+    assert endpoint.request_count == 1
+    request = endpoint.requests[0]
+    assert request["to"] == ["+254700123456"]
+    assert "KSH 50,000.00" in request["message"]
+    assert request["headers"][b"apikey"] == service.api_key.encode()
+    assert response["SMSMessageData"]["Recipients"][0]["status"] == "Success"
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_across_notifications():
+    endpoint = FakeATEndpoint()
+    service = SMSService(transport=httpx.ASGITransport(app=endpoint))
+
+    await service.send_order_notification("+254700123456", "Jane", "Laptop", 1)
+    client = service._client
+    await service.send_order_notification("+254700123457", "John", "Phone", 2)
+
+    assert service._client is client
+    assert endpoint.request_count == 2
+    await service.aclose()
+    assert service._client is None
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_caps_in_flight_requests(monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "SMS_MAX_CONCURRENCY", 3)
+    endpoint = FakeATEndpoint(latency=0.01)
+    service = SMSService(transport=httpx.ASGITransport(app=endpoint))
+
+    await asyncio.gather(*[
+        service.send_order_notification(f"+2547001234{i:02d}", "Jane", "Laptop", 1)
+        for i in range(12)
+    ])
+    await service.aclose()
+
+    assert endpoint.request_count == 12
+    assert endpoint.max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_api_error_falls_back_to_simulation():
+    endpoint = FakeATEndpoint(status_code=500)
+    service = SMSService(transport=httpx.ASGITransport(app=endpoint))
+
+    response = await service.send_order_notification("+254700123456", "Jane", "Laptop", 1)
+    await service.aclose()
+
+    recipient = response["SMSMessageData"]["Recipients"][0]
+    assert recipient["number"] == "+254700123456"
+    assert recipient["status"] == "Success"